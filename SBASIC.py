@@ -2,18 +2,73 @@
 # Author: martinP (with assistance from AI)
 # Description: An interpreter for the S-BASIC language with support for loops, subroutines, and screen control.
 
-import time
 import random
 import re
 import curses
+from vscreen import VirtualScreen
+
+# Lines starting with these change labels or block structure
+STRUCTURAL_PREFIXES = ("IF", "ENDIF", "ELSE", "FOR", "NEXT", "LABEL")
+
+
+def _is_structural(line):
+    return line.strip().upper().startswith(STRUCTURAL_PREFIXES)
+
+
+class Program:
+    """A parsed S-BASIC script.
+
+    Holds every line split into command and arguments, the LABEL table and
+    the block jumps (IF/ENDIF, FOR/NEXT, ELSE) resolved while running.
+    `update()` keeps all of it when only non-structural lines changed.
+    """
+    def __init__(self, lines):
+        self.lines = list(lines)
+        self.parsed = [self._parse(line) for line in self.lines]
+        self.labels = {}
+        self.block_ends = {}  # (line, start_kw, end_kw) -> matching line
+        self.elses = {}       # (if line, endif line) -> ELSE line or None
+        for i, line in enumerate(self.lines):
+            parts = line.strip().split()
+            if len(parts) > 1 and parts[0].upper() == "LABEL":
+                self.labels[parts[1].lower()] = i
+
+    @staticmethod
+    def _parse(line):
+        line = line.strip()
+        if not line or line.upper().startswith("REM"):
+            return None
+        parts = line.split()
+        return parts[0].upper(), parts[1:], parts
+
+    def update(self, lines):
+        """Returns a program for `lines`, reusing this one where possible."""
+        lines = list(lines)
+        if len(lines) != len(self.lines):
+            return Program(lines)
+        changed = [i for i, (old, new) in enumerate(zip(self.lines, lines)) if old != new]
+        if any(_is_structural(self.lines[i]) or _is_structural(lines[i]) for i in changed):
+            return Program(lines)
+        for i in changed:
+            self.lines[i] = lines[i]
+            self.parsed[i] = self._parse(lines[i])
+        return self
+
 
 class Interpreter:
-    """Executes S-BASIC scripts within a curses window."""
+    """Executes S-BASIC scripts within a curses window.
+
+    Output goes through a VirtualScreen, so a run of PRINTs reaches the
+    terminal as one update; pass a headless VirtualScreen to run without one.
+    """
     def __init__(self, stdscr):
+        if not isinstance(stdscr, VirtualScreen):
+            stdscr = VirtualScreen(stdscr)
         self.stdscr = stdscr
         self.variables = {}
         self.labels = {}
         self.lines = []
+        self.program = Program([])
         self.pc = 0  # Program Counter
 
         # Stacks for control structures
@@ -29,17 +84,15 @@ class Interpreter:
         return re.sub(r'%(\w+)%', repl, text)
 
     def _preprocess(self):
-        """First pass: Scan for all LABEL definitions."""
-        for i, line in enumerate(self.lines):
-            parts = line.strip().split()
-            if not parts:
-                continue
-            if parts[0].upper() == "LABEL":
-                if len(parts) > 1:
-                    self.labels[parts[1].lower()] = i
+        """First pass: Collect all LABEL definitions of the program."""
+        self.labels.update(self.program.labels)
 
     def _find_matching_block_end(self, start_index, start_kw="IF", end_kw="ENDIF"):
         """Finds the matching ENDIF or NEXT for a block, handling nesting."""
+        key = (start_index, start_kw, end_kw)
+        if key in self.program.block_ends:
+            return self.program.block_ends[key]
+        end = len(self.lines)
         nest_level = 1
         for i in range(start_index + 1, len(self.lines)):
             line = self.lines[i].strip().upper()
@@ -48,15 +101,21 @@ class Interpreter:
             elif line.startswith(end_kw):
                 nest_level -= 1
                 if nest_level == 0:
-                    return i
-        return len(self.lines)
+                    end = i
+                    break
+        self.program.block_ends[key] = end
+        return end
 
     def _find_else(self, if_index, endif_index):
         """Finds an ELSE within an IF/ENDIF block."""
-        for i in range(if_index + 1, endif_index):
-            if self.lines[i].strip().upper() == "ELSE":
-                return i
-        return None
+        key = (if_index, endif_index)
+        if key not in self.program.elses:
+            self.program.elses[key] = None
+            for i in range(if_index + 1, endif_index):
+                if self.lines[i].strip().upper() == "ELSE":
+                    self.program.elses[key] = i
+                    break
+        return self.program.elses[key]
 
     def _safe_eval(self, expr):
         """Evaluate an expression safely using variables."""
@@ -69,20 +128,28 @@ class Interpreter:
 
     def run(self, script_content):
         """Main entry point to execute a script."""
-        self.lines = script_content.strip().splitlines()
+        self.run_program(Program(script_content.strip().splitlines()))
+
+    def run_program(self, program):
+        """Executes an already parsed Program."""
+        self.program = program
+        self.lines = program.lines
         self._preprocess()
 
         self.pc = 0
+        self.resume()
+
+    def resume(self):
+        """Continues the current program from self.pc, e.g. after set_state()."""
+        program = self.program
         while self.pc < len(self.lines):
-            line = self.lines[self.pc].strip()
+            parsed = program.parsed[self.pc]
 
-            if not line or line.upper().startswith("REM"):
+            if parsed is None:
                 self.pc += 1
                 continue
 
-            parts = line.split()
-            command = parts[0].upper()
-            args = parts[1:]
+            command, args, parts = parsed
 
             # --- Command Handling ---
             if command == "PRINT":
@@ -104,9 +171,7 @@ class Interpreter:
                 var_name = args[0].lower()
                 prompt = self._sub_vars(" ".join(args[1:])) + " "
                 self.stdscr.addstr(prompt)
-                curses.echo()
                 input_str = self.stdscr.getstr().decode('utf-8')
-                curses.noecho()
                 # Try to convert to int or float, else keep string
                 try:
                     val = int(input_str)
@@ -206,7 +271,7 @@ class Interpreter:
 
             elif command == "WAIT":
                 try:
-                    time.sleep(float(self._sub_vars(args[0])))
+                    self.stdscr.sleep(float(self._sub_vars(args[0])))
                 except Exception:
                     pass
 
@@ -215,6 +280,27 @@ class Interpreter:
         self.stdscr.addstr("\n\nScript finished. Press any key to exit.")
         self.stdscr.getch()
 
+    def get_state(self):
+        """Returns the execution state of the script as plain (JSON-able) data."""
+        return {
+            "variables": dict(self.variables),
+            "labels": dict(self.labels),
+            "lines": list(self.lines),
+            "pc": self.pc,
+            "for_loop_stack": [dict(loop) for loop in self.for_loop_stack],
+            "gosub_stack": list(self.gosub_stack),
+        }
+
+    def set_state(self, state):
+        """Restores a state from get_state(); resume() then continues the script."""
+        self.program = Program(state["lines"])
+        self.lines = self.program.lines
+        self.variables = dict(state["variables"])
+        self.labels = dict(state["labels"])
+        self.pc = state["pc"]
+        self.for_loop_stack = [dict(loop) for loop in state["for_loop_stack"]]
+        self.gosub_stack = list(state["gosub_stack"])
+
     def set_message(self, msg):
         # Could implement status line or logging
         pass
@@ -11,7 +11,10 @@ from boot_sim import *
 from game_Pack import *
 from sedit import *
 from SBASIC import Interpreter
+from hibernate import SnapshotError, discard_snapshot, load_snapshot, save_snapshot
+from lineedit import DosCompleter, LineEditor
 from time import sleep
+import curses
 import os
 import time
 import sys
@@ -21,6 +24,7 @@ from random import randint
 
 # variables
 current_dir = ["C:\\"]  # store path segments in a list
+suspended_script = [None]  # (filename, interpreter state) of a script stopped with Ctrl-C
 version = "0.0.1"
 
 # color  (colorama)
@@ -42,6 +46,17 @@ FILES = {
         ("COMMAND.COM", "38KB"),
         ("GAMES", "<DIR>"),
         ("BIN", "<DIR>"),
+        ("COUNT.SDOS", "1KB", "\n".join([
+            "SET i = 0",
+            "LABEL loop",
+            "SET i = i + 1",
+            "PRINT Count %i%",
+            "WAIT 1",
+            "IF i < 10 THEN",
+            "GOTO loop",
+            "ENDIF",
+            "PRINT Done.",
+        ])),
     ],
     "C:\\GAMES": [
         ("SNAKE.C", "12KB"),
@@ -57,6 +72,16 @@ FILES = {
     ],
 }
 
+# command names offered by Tab completion
+COMMANDS = ["HELP", "DIR", "CLS", "GAMES", "CD", "ECHO", "RUN", "HIBERNATE", "VER",
+            "TIME", "OS", "EXIT", "PING", "PI", "SEDIT"]
+
+# what Tab completes after a command: CD takes directory paths, RUN the
+# name of a script in the current directory
+COMPLETE_ARGS = {"CD": "dirs", "RUN": ".SDOS"}
+
+completer = DosCompleter(COMMANDS, FILES, lambda: current_dir[0], COMPLETE_ARGS)
+
 def SDOS_BANNER():
     banner = r"""
  _____                                     _____ 
@@ -97,6 +122,7 @@ def cmd_help():
     print("  CD [dir]  - Change directory")
     print("  ECHO text - Print text to the screen")
     print("  RUN [file.SDOS]- Execute an S-BASIC script") 
+    print("  HIBERNATE - Save the session and exit (resume with --resume)")
     print("  VER       - Display DOS version")
     print("  TIME      - Display system time")
     print("  HELP      - Show this help message")
@@ -109,7 +135,7 @@ def cmd_help():
 def cmd_dir(path):
     entries = FILES.get(path, [])
     print(f" Directory of {path}\n")
-    for name, size in entries:
+    for name, size, *_ in entries:
         time.sleep(0.05)
         print(f"{name:<20} {size:>8}")
     print()
@@ -151,10 +177,121 @@ def cmd_pi():
     print("Pi to 50 decimal places:")
     print(pi_digits)
 
+def run_script(filename, program=None, state=None):
+    """Runs an S-BASIC script, or resumes one from its saved state.
+
+    Ctrl-C stops the script and keeps its state, so a later RUN (or a
+    resumed session) continues where it stopped.
+    """
+    interpreter = [None]
+
+    def main(stdscr):
+        interpreter[0] = Interpreter(stdscr)
+        if state is None:
+            interpreter[0].run(program)
+        else:
+            interpreter[0].set_state(state)
+            interpreter[0].resume()
+
+    try:
+        curses.wrapper(main)
+    except KeyboardInterrupt:
+        if interpreter[0] is None:
+            return
+        suspended_script[0] = (filename, interpreter[0].get_state())
+        print(f"Script {filename} suspended. Type RUN to continue it.")
+        return
+    suspended_script[0] = None
+    print(f"Script {filename} finished.\n")
+
+
+def hibernate_state():
+    """The whole session as plain data for a snapshot."""
+    return {
+        "current_dir": current_dir[0],
+        "files": FILES,
+        "script": suspended_script[0],
+    }
+
+
+# what a suspended script's interpreter state holds (see Interpreter.get_state)
+SCRIPT_STATE_TYPES = {"variables": dict, "labels": dict, "lines": list, "pc": int,
+                      "for_loop_stack": list, "gosub_stack": list}
+
+
+def restore_state(state):
+    """Restores a hibernate_state(); raises SnapshotError if it is damaged.
+
+    Nothing is changed unless the whole state checks out.
+    """
+    try:
+        files = {}
+        for path, entries in state["files"].items():
+            files[path] = [tuple(entry) for entry in entries]
+            if not isinstance(path, str) or not all(
+                    len(entry) >= 2 and all(isinstance(field, str) for field in entry)
+                    for entry in files[path]):
+                raise SnapshotError(f"bad directory {path!r}")
+        directory = state["current_dir"]
+        if directory not in files:
+            raise SnapshotError(f"unknown current directory {directory!r}")
+        script = state["script"]
+        if script:
+            filename, script_state = script
+            if not isinstance(filename, str) or not isinstance(script_state, dict) or not all(
+                    isinstance(script_state.get(key), kind) for key, kind in SCRIPT_STATE_TYPES.items()):
+                raise SnapshotError("bad suspended script")
+            script = (filename, script_state)
+    except KeyError as e:
+        raise SnapshotError(f"the snapshot is damaged: {e} is missing") from e
+    except (TypeError, ValueError, AttributeError) as e:
+        raise SnapshotError("the snapshot is damaged") from e
+    except SnapshotError as e:
+        raise SnapshotError(f"the snapshot is damaged: {e}") from None
+    current_dir[0] = directory
+    FILES.clear()
+    FILES.update(files)
+    completer.invalidate()
+    suspended_script[0] = script or None
+
+
+def cmd_hibernate():
+    t = time.perf_counter()
+    try:
+        save_snapshot(hibernate_state())
+    except OSError as e:
+        print(f"Hibernate failed: {e}")
+        return False
+    except (TypeError, ValueError) as e:
+        # e.g. a script variable holding a complex number or a set
+        print(f"Hibernate failed: the session holds a value that cannot be saved ({e})")
+        return False
+    print(f"Session saved in {(time.perf_counter() - t) * 1000:.1f} ms. Start with --resume to continue.")
+    print("System hibernated.")
+    return True
+
+
+def dos_resume():
+    """Restores the last HIBERNATE snapshot; returns False if there is none."""
+    t = time.perf_counter()
+    try:
+        restore_state(load_snapshot())
+    except SnapshotError as e:
+        print(f"Cannot resume: {e}")
+        return False
+    discard_snapshot()
+    print(f"Resumed from hibernation in {(time.perf_counter() - t) * 1000:.1f} ms.")
+    if suspended_script[0]:
+        print(f"Script {suspended_script[0][0]} is suspended. Type RUN to continue it.")
+    print()
+    return True
+
+
 def dos_loop():
+    editor = LineEditor(completer)
     while True:
         try:
-            cmd_line = input(Fore.GREEN + f"{current_dir[0]}>" + Style.RESET_ALL)
+            cmd_line = editor.read(Fore.GREEN + f"{current_dir[0]}>" + Style.RESET_ALL)
         except (EOFError, KeyboardInterrupt):
             print("\n")
             break
@@ -187,7 +324,7 @@ def dos_loop():
         elif cmd == "PI":
             cmd_pi()
         elif cmd == "SEDIT":
-            sedit()
+            sedit(*args[:1])
         elif cmd == "CD":
             if not args:
                 print(f"Current directory: {current_dir[0]}")
@@ -202,41 +339,41 @@ def dos_loop():
                         current_dir[0] = drive_path
                     else:
                         print(f"The system cannot find the drive {target}")
-                elif target == "\\":
-                    # Go to root of current drive
-                    current_dir[0] = current_dir[0][0] + ":\\"
-                elif target == "..":
-                    # Move up one directory
-                    parts = current_dir[0].rstrip("\\").split("\\")
-                    if len(parts) > 1:
-                        current_dir[0] = "\\".join(parts[:-1]) + "\\"
-                    else:
-                        print("Already at root directory.")
+                elif target.rstrip("\\") == ".." and current_dir[0].endswith(":\\"):
+                    print("Already at root directory.")
                 else:
-                    # Subdirectory of current path
-                    new_path = current_dir[0].rstrip("\\") + "\\" + target  # build path without extra trailing slash
-                    if new_path in FILES:
+                    # Relative ("GAMES", "..\\BIN"), rooted ("\\GAMES") or
+                    # drive ("A:\\") paths, with or without a trailing "\\"
+                    new_path = completer.resolve(target)
+                    if new_path is not None:
                         current_dir[0] = new_path
                     else:
                         print("The system cannot find the path specified.")
         elif cmd == "RUN":
             if not args:
-                print("Usage: RUN [filename.SDOS]")
+                if suspended_script[0]:
+                    filename, state = suspended_script[0]
+                    print(f"Continuing {filename}...\n")
+                    run_script(filename, state=state)
+                else:
+                    print("Usage: RUN [filename.SDOS]")
             else:
                 filename = args[0].upper()
                 if not filename.endswith(".SDOS"):
                     print("Error: RUN command only supports .SDOS files.")
                 else:
                     script_found = False
-                    for f in FILES.get(current_dir[0], []):
-                        if f["name"].upper() == filename:
+                    for name, size, *content in FILES.get(current_dir[0], []):
+                        if name.upper() == filename and content:
                             script_found = True
                             print(f"Running {filename}...\n")
-                            print(f"Simulated execution:\n{f['content']}\n")
-                            print(f"Script {filename} finished.\n")
+                            run_script(filename, program=content[0])
                             break
                     if not script_found:
                         print(f"Error: File '{filename}' not found in current directory.")
+        elif cmd == "HIBERNATE":
+            if cmd_hibernate():
+                break
         elif cmd == "EXIT":
             print("System halted.")
             time.sleep(1)
@@ -247,5 +384,7 @@ def dos_loop():
 
 ####    Run    ####
 if __name__ == "__main__":
-    dos_intro()
+    if "--resume" not in sys.argv[1:] or not dos_resume():
+        bootUp()
+        dos_intro()
     dos_loop()
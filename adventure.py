@@ -0,0 +1,466 @@
+"""
+name: "adventure"
+description: "Data-driven text adventure engine for the SDOS games pack"
+author: "martinP"
+
+A world is a JSON-lines file. The first line is the header:
+
+    {"adventure": 1, "title": "...", "start": "cell", "intro": "...",
+     "items": {"key": {"name": "a brass key", "description": "..."}}}
+
+and every further line is one room:
+
+    {"id": "cell", "name": "Cell", "description": "...",
+     "exits": {"door": "hall",
+               "window": {"to": "yard", "aliases": ["w"], "requires": "key",
+                          "locked": "It is barred."}},
+     "items": ["key"], "actions": {"wait": "Time passes."}, "ending": false}
+
+Rooms are not parsed up front. World keeps the byte offset of every room,
+cached in a hidden .idx file next to the world and rebuilt when the world
+changes, and parses a room the first time it is entered (keeping the most
+recent ones in an LRU cache). A world of thousands of rooms opens as fast
+as a small one.
+
+Run it headless with a command script for automated playthroughs:
+
+    python adventure.py WORLD --script COMMANDS [--time]
+"""
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+WORLD_VERSION = 1
+SAVE_VERSION = 1
+ROOM_CACHE_SIZE = 256  # parsed rooms kept in memory
+DEFAULT_SAVE = "adventure.sav"
+
+# the id of a room line, without parsing the whole line
+_ROOM_ID = re.compile(rb'\s*\{\s*"id"\s*:\s*("(?:[^"\\]|\\.)*")')
+
+DIRECTIONS = {"n": "north", "s": "south", "e": "east", "w": "west", "u": "up", "d": "down"}
+
+
+class WorldError(Exception):
+    """A world, its index or a saved game cannot be used."""
+
+
+def index_path(path):
+    folder, name = os.path.split(os.path.abspath(path))
+    return os.path.join(folder, f".{name}.idx")
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _write_atomic(path, text):
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix=".adventure-")
+    try:
+        with open(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _check(ok, what):
+    if not ok:
+        raise WorldError(what)
+
+
+def _strings(value):
+    return isinstance(value, list) and all(isinstance(v, str) for v in value)
+
+
+class Room:
+    __slots__ = ("id", "name", "description", "exits", "aliases", "items", "actions", "ending")
+
+    def __init__(self, data):
+        _check(isinstance(data, dict) and isinstance(data.get("id"), str), "the room has no id")
+        self.id = data["id"]
+        self.name = data.get("name", self.id)
+        self.description = data.get("description", "")
+        self.exits = {}    # exit name -> {"to": ..., "requires": ..., "locked": ...}
+        self.aliases = {}  # typed word -> exit name
+        exits = data.get("exits", {})
+        _check(isinstance(exits, dict), "the exits are not an object")
+        for name, exit in exits.items():
+            if isinstance(exit, str):
+                exit = {"to": exit}
+            _check(isinstance(exit, dict) and isinstance(exit.get("to"), str),
+                   f"exit {name!r} leads nowhere")
+            _check(_strings(exit.get("aliases", [])), f"exit {name!r} has bad aliases")
+            _check(isinstance(exit.get("requires", ""), (str, type(None))),
+                   f"exit {name!r} requires something that is not an item")
+            self.exits[name] = exit
+            self.aliases[name] = name
+            for alias in exit.get("aliases", ()):
+                self.aliases[alias] = name
+        _check(_strings(data.get("items", [])), "the items are not a list of item ids")
+        self.items = list(data.get("items", ()))
+        self.actions = data.get("actions", {})
+        _check(isinstance(self.actions, dict), "the actions are not an object")
+        for name, action in self.actions.items():
+            _check(isinstance(action, str) or (
+                       isinstance(action, dict)
+                       and isinstance(action.get("text", ""), str)
+                       and isinstance(action.get("to", ""), str)),
+                   f"action {name!r} is neither text nor an object with text and to")
+        self.ending = bool(data.get("ending", False))
+
+
+class World:
+    """A world file opened through its room index."""
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._open()
+        except BaseException:
+            self._file.close()
+            raise
+        self.rooms_parsed = 0
+        self._rooms = OrderedDict()
+
+    def _open(self):
+        path = self.path
+        try:
+            header = json.loads(self._file.readline())
+        except ValueError as e:
+            raise WorldError(f"{path}: bad header: {e}") from e
+        if not isinstance(header, dict):
+            raise WorldError(f"{path}: the header is not an object")
+        if header.get("adventure") != WORLD_VERSION:
+            raise WorldError(f"{path}: unsupported world version {header.get('adventure')!r}")
+        if not isinstance(header.get("start"), str):
+            raise WorldError(f"{path}: the header names no start room")
+        if not isinstance(header.get("items", {}), dict):
+            raise WorldError(f"{path}: the header's items are not an object")
+        self.title = header.get("title", os.path.basename(path))
+        self.start = header["start"]
+        self.intro = header.get("intro", "")
+        self.items = header.get("items", {})
+        self.offsets = self._load_index()
+        if self.start not in self.offsets:
+            raise WorldError(f"{path}: the start room {self.start!r} does not exist")
+
+    def __contains__(self, room_id):
+        return room_id in self.offsets
+
+    def room(self, room_id):
+        room = self._rooms.get(room_id)
+        if room is not None:
+            self._rooms.move_to_end(room_id)
+            return room
+        try:
+            offset = self.offsets[room_id]
+        except KeyError:
+            raise WorldError(f"{self.path}: no room {room_id!r}") from None
+        self._file.seek(offset)
+        try:
+            room = Room(json.loads(self._file.readline()))
+        except WorldError as e:
+            raise WorldError(f"{self.path}: room {room_id!r}: {e}") from None
+        except ValueError as e:
+            raise WorldError(f"{self.path}: room {room_id!r} is malformed") from e
+        self.rooms_parsed += 1
+        self._rooms[room_id] = room
+        if len(self._rooms) > ROOM_CACHE_SIZE:
+            self._rooms.popitem(last=False)
+        return room
+
+    def item_name(self, item):
+        return self.items.get(item, {}).get("name", item)
+
+    def close(self):
+        self._file.close()
+
+    def _load_index(self):
+        stamp = _stamp(self.path)
+        idx = index_path(self.path)
+        try:
+            with open(idx, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("stamp") == stamp:
+                return cached["rooms"]
+        except (OSError, ValueError, AttributeError):
+            pass
+        offsets = self._scan()
+        try:
+            _write_atomic(idx, json.dumps({"stamp": stamp, "rooms": offsets}, separators=(",", ":")))
+        except OSError:
+            pass  # read-only folder: scan again next time
+        return offsets
+
+    def _scan(self):
+        """Finds the offset of every room line."""
+        offsets = {}
+        f = self._file
+        f.seek(0)
+        offset = len(f.readline())
+        for line in f:
+            if line.strip():
+                m = _ROOM_ID.match(line)
+                try:
+                    room_id = json.loads(m.group(1)) if m else json.loads(line)["id"]
+                except (ValueError, KeyError, TypeError) as e:
+                    raise WorldError(f"{self.path}: no room id at byte {offset}") from e
+                offsets[room_id] = offset
+            offset += len(line)
+        return offsets
+
+
+class Adventure:
+    """The state of one playthrough; execute() runs one command."""
+    def __init__(self, world):
+        self.world = world
+        self.location = world.start
+        self.inventory = []
+        self.room_items = {}  # items of rooms that changed, by room id
+        self.visited = {world.start}
+        self.moves = 0
+        self.over = False
+
+    # --- state ---
+
+    def items_in(self, room_id):
+        items = self.room_items.get(room_id)
+        return self.world.room(room_id).items if items is None else items
+
+    def to_state(self):
+        """The game as compact plain data: only what differs from the world."""
+        return {"v": SAVE_VERSION, "w": self.world.title, "at": self.location,
+                "inv": self.inventory, "rooms": self.room_items,
+                "seen": sorted(self.visited), "moves": self.moves, "over": self.over}
+
+    def from_state(self, state):
+        if not isinstance(state, dict):
+            raise WorldError("the saved game is damaged")
+        if state.get("v") != SAVE_VERSION or state.get("w") != self.world.title:
+            raise WorldError("the saved game is from another world or version")
+        try:
+            location = state["at"]
+            inventory = [str(item) for item in state["inv"]]
+            room_items = {str(room): [str(item) for item in items]
+                          for room, items in state["rooms"].items()}
+            visited = {str(room) for room in state["seen"]}
+            moves = int(state["moves"])
+            over = bool(state["over"])
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            raise WorldError("the saved game is damaged") from e
+        if location not in self.world:
+            raise WorldError(f"the saved game is in an unknown room {location!r}")
+        self.location = location
+        self.inventory = inventory
+        self.room_items = room_items
+        self.visited = visited
+        self.moves = moves
+        self.over = over
+
+    def save(self, path=DEFAULT_SAVE):
+        _write_atomic(path, json.dumps(self.to_state(), separators=(",", ":")))
+
+    def load(self, path=DEFAULT_SAVE):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            raise WorldError(f"cannot load {path}: {e}") from e
+        self.from_state(state)
+
+    # --- commands ---
+
+    def describe(self):
+        room = self.world.room(self.location)
+        lines = [f"== {room.name} ==", room.description]
+        items = self.items_in(room.id)
+        if items:
+            lines.append("You see: " + ", ".join(self.world.item_name(i) for i in items) + ".")
+        if room.exits and not room.ending:
+            lines.append("Exits: " + ", ".join(room.exits) + ".")
+        return "\n".join(line for line in lines if line)
+
+    def execute(self, command):
+        """Runs one command and returns what the player sees."""
+        words = command.lower().split()
+        if not words:
+            return ""
+        if self.over:
+            return "The adventure is over."
+        verb, rest = words[0], " ".join(words[1:])
+        path = command.strip()[len(verb):].strip()  # file names keep their case
+        room = self.world.room(self.location)
+
+        if command.lower().strip() in room.actions:
+            return self._action(room.actions[command.lower().strip()])
+        if verb in ("look", "l"):
+            return self.describe()
+        if verb in ("inventory", "inv", "i"):
+            if not self.inventory:
+                return "You are carrying nothing."
+            return "You are carrying: " + ", ".join(map(self.world.item_name, self.inventory)) + "."
+        if verb in ("take", "get"):
+            return self._take(rest)
+        if verb == "drop":
+            return self._drop(rest)
+        if verb in ("examine", "x"):
+            return self._examine(rest)
+        if verb == "save":
+            try:
+                self.save(path or DEFAULT_SAVE)
+            except OSError as e:
+                return f"Save failed: {e}"
+            return "Game saved."
+        if verb == "load":
+            try:
+                self.load(path or DEFAULT_SAVE)
+            except WorldError as e:
+                return str(e)
+            return "Game loaded.\n" + self.describe()
+        if verb in ("help", "?"):
+            return ("Commands: LOOK, GO <exit> (or just the exit), TAKE/DROP/EXAMINE <item>, "
+                    "INVENTORY, SAVE/LOAD [file], QUIT.")
+        if verb == "go" and rest:
+            return self._go(room, rest)
+        target = command.lower().strip()
+        if target in room.aliases or DIRECTIONS.get(target) in room.aliases:
+            return self._go(room, target)
+        return "You can't do that here."
+
+    def _action(self, action):
+        if isinstance(action, str):
+            return action
+        text = action.get("text", "")
+        if "to" in action:
+            return "\n".join(filter(None, [text, self._enter(action["to"])]))
+        return text
+
+    def _go(self, room, word):
+        name = room.aliases.get(word) or room.aliases.get(DIRECTIONS.get(word))
+        if name is None:
+            return "You can't go that way."
+        exit = room.exits[name]
+        needs = exit.get("requires")
+        if needs and needs not in self.inventory:
+            return exit.get("locked", "The way is blocked.")
+        return self._enter(exit["to"])
+
+    def _enter(self, room_id):
+        if room_id not in self.world:
+            return "That way leads nowhere."
+        self.location = room_id
+        self.visited.add(room_id)
+        self.moves += 1
+        if self.world.room(room_id).ending:
+            self.over = True
+        return self.describe()
+
+    def _find(self, items, name):
+        for item in items:
+            if name in (item, self.world.item_name(item).lower()):
+                return item
+        return None
+
+    def _take(self, name):
+        items = self.items_in(self.location)
+        item = self._find(items, name)
+        if item is None:
+            return "You don't see that here."
+        self.room_items[self.location] = [i for i in items if i != item]
+        self.inventory.append(item)
+        return f"Taken: {self.world.item_name(item)}."
+
+    def _drop(self, name):
+        item = self._find(self.inventory, name)
+        if item is None:
+            return "You aren't carrying that."
+        self.inventory.remove(item)
+        self.room_items[self.location] = self.items_in(self.location) + [item]
+        return f"Dropped: {self.world.item_name(item)}."
+
+    def _examine(self, name):
+        item = self._find(self.inventory, name) or self._find(self.items_in(self.location), name)
+        if item is None:
+            return "You don't see that here."
+        return self.world.items.get(item, {}).get("description", "Nothing special.")
+
+
+def play(world, read=input, write=print):
+    """Plays interactively until the adventure ends, QUIT or end of input."""
+    game = Adventure(world)
+    if world.intro:
+        write(world.intro + "\n")
+    write(game.describe())
+    while not game.over:
+        try:
+            command = read("\n> ")
+        except EOFError:
+            break
+        if command.strip().lower() in ("quit", "q"):
+            break
+        write(game.execute(command))
+    return game
+
+
+def run_script(world, commands, echo=True):
+    """Plays a list of commands headlessly; returns (game, transcript)."""
+    game = Adventure(world)
+    transcript = [game.describe()]
+    for command in commands:
+        command = command.strip()
+        if not command or command.startswith("#"):
+            continue
+        if echo:
+            transcript.append(f"> {command}")
+        transcript.append(game.execute(command))
+        if game.over:
+            break
+    return game, transcript
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Play a text adventure world.")
+    parser.add_argument("world", help="world file (JSON lines)")
+    parser.add_argument("--script", help="file of commands to play headlessly, one per line")
+    parser.add_argument("--time", action="store_true", help="report load and playthrough timings")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    try:
+        world = World(args.world)
+    except (OSError, WorldError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    t1 = time.perf_counter()
+    try:
+        if args.script:
+            with open(args.script, "r", encoding="utf-8") as f:
+                commands = f.read().splitlines()
+            game, transcript = run_script(world, commands)
+            print("\n".join(transcript))
+        else:
+            game = play(world)
+        t2 = time.perf_counter()
+        if args.time:
+            print(f"\nopened {len(world.offsets)} rooms in {(t1 - t0) * 1000:.2f} ms, "
+                  f"played {game.moves} moves in {(t2 - t1) * 1000:.2f} ms, "
+                  f"parsed {world.rooms_parsed} rooms", file=sys.stderr)
+    except WorldError as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        world.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
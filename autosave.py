@@ -0,0 +1,236 @@
+"""
+Background saving and crash recovery for SEDIT.
+
+Saves run on a worker thread. The editor hands over an O(1) snapshot of its
+piece table and keeps handling keys while the worker writes a temporary
+file and renames it over the target, so a crash never leaves a truncated
+file behind.
+
+Every change is also appended to a recovery journal next to the file. Every
+AUTOSAVE_INTERVAL seconds the worker checkpoints the whole buffer to a
+recovery copy and starts a fresh journal. After a crash, the file (or the
+recovery copy) plus the journal replay up to the last edit.
+"""
+from __future__ import annotations
+
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+from typing import Iterable, Optional
+
+from textbuffer import MappedLines, TextBuffer
+
+AUTOSAVE_INTERVAL = 30.0  # seconds between recovery checkpoints
+JOURNAL_VERSION = 1
+
+# read once: os.umask() can only be read by setting it, which would race
+# with files the editor opens while the worker thread saves
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+
+def recovery_paths(path: str):
+    """Returns the (journal, recovery copy) paths kept next to `path`."""
+    folder, name = os.path.split(os.path.abspath(path))
+    return (os.path.join(folder, f'.{name}.sedit-journal'),
+            os.path.join(folder, f'.{name}.sedit-recover'))
+
+
+def atomic_write(path: str, lines: Iterable[str]):
+    """Writes lines to a temporary file, then renames it over `path`.
+
+    A symlinked `path` keeps its link; the file it points to is replaced.
+    """
+    path = os.path.realpath(path)
+    folder = os.path.dirname(path)
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix='.sedit-')
+    try:
+        with open(fd, 'w', encoding='utf-8') as f:
+            for line in lines:
+                f.write(line)
+                f.write('\n')
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            mode = os.stat(path).st_mode & 0o7777
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK  # what open(path, 'w') would have given
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _stamp(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _read_journal(path: str):
+    """Returns (header, edits) of a journal, or None if there is none.
+
+    A torn last record (crash mid-write) ends the replay there.
+    """
+    journal, _ = recovery_paths(path)
+    try:
+        f = open(journal, 'r', encoding='utf-8')
+    except OSError:
+        return None
+    edits = []
+    with f:
+        try:
+            header = json.loads(f.readline())
+        except ValueError:
+            return None
+        if header.get('sedit_journal') != JOURNAL_VERSION:
+            return None
+        for line in f:
+            try:
+                edits.append(json.loads(line)['e'])
+            except (ValueError, KeyError):
+                break
+    return header, edits
+
+
+def find_recovery(path: str) -> Optional[int]:
+    """Returns how many unsaved changes can be recovered for `path`.
+
+    None means there is nothing (usable) to recover.
+    """
+    found = _read_journal(path)
+    if found is None:
+        return None
+    header, edits = found
+    _, recover = recovery_paths(path)
+    if header['base'] == 'recover':
+        if _stamp(recover) != header['stamp']:
+            return None
+        return len(edits) or 1
+    if _stamp(path) != header['stamp'] or not edits:
+        return None
+    return len(edits)
+
+
+def recover(path: str) -> TextBuffer:
+    """Rebuilds the buffer left behind by a crashed session."""
+    header, edits = _read_journal(path)
+    base = path if header['base'] == 'file' else recovery_paths(path)[1]
+    if os.path.exists(base):
+        buf = TextBuffer(MappedLines(base))
+        buf.sync(wait=True)
+    else:
+        buf = TextBuffer([''])
+    for change in edits:
+        if len(change) == 1:
+            row, count, new_lines = change[0]
+            buf.replace(row, count, new_lines)
+        else:
+            buf.replace_rows(change)
+    # the base is about to be saved over or deleted; don't keep it mapped
+    buf.release_source()
+    return buf
+
+
+def discard_recovery(path: str):
+    for p in recovery_paths(path):
+        try:
+            os.unlink(p)
+        except FileNotFoundError:
+            pass
+
+
+class Autosaver:
+    """Worker thread owning the file, its journal and recovery copy.
+
+    Jobs are handled in order, so journal records always line up with the
+    checkpoint or save that came before them. Results of saves are posted
+    to `results` as ('saved', token) or ('error', exc).
+    """
+    def __init__(self, path: str, initial: Optional[TextBuffer] = None):
+        self.path = path
+        self.journal_path, self.recover_path = recovery_paths(path)
+        self.results: queue.Queue = queue.Queue()
+        self._jobs: queue.Queue = queue.Queue()
+        self._journal = None
+        self._dirty = False
+        self._last_checkpoint = time.monotonic()
+        if initial is not None:
+            # recovered edits: persist them before anything else
+            self._jobs.put(('checkpoint', initial.snapshot()))
+        else:
+            self._jobs.put(('reset',))
+        self._thread = threading.Thread(target=self._work, daemon=True)
+        self._thread.start()
+
+    def log(self, edits):
+        """Journals a change given as (row, count, new_lines) replacements."""
+        self._jobs.put(('edit', edits))
+        self._dirty = True
+
+    def tick(self, buffer: TextBuffer):
+        """Checkpoints the buffer if it changed and the interval passed."""
+        if (self._dirty and buffer.complete
+                and time.monotonic() - self._last_checkpoint >= AUTOSAVE_INTERVAL):
+            self._jobs.put(('checkpoint', buffer.snapshot()))
+            self._dirty = False
+            self._last_checkpoint = time.monotonic()
+
+    def save(self, buffer: TextBuffer, token):
+        """Queues a save of the (fully loaded) buffer to the file."""
+        self._jobs.put(('save', buffer.snapshot(), token))
+        self._dirty = False
+
+    def close(self, keep_recovery: bool = False):
+        """Finishes pending jobs and, unless asked not to, removes the
+        recovery files."""
+        self._jobs.put(('close', keep_recovery))
+        self._thread.join()
+
+    def _start_journal(self, base: str, stamp):
+        if self._journal is not None:
+            self._journal.close()
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.journal_path), prefix='.sedit-')
+        with open(fd, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'sedit_journal': JOURNAL_VERSION, 'file': os.path.abspath(self.path),
+                                'base': base, 'stamp': stamp}) + '\n')
+        os.replace(tmp, self.journal_path)
+        self._journal = open(self.journal_path, 'a', encoding='utf-8')
+
+    def _work(self):
+        while True:
+            job = self._jobs.get()
+            kind = job[0]
+            try:
+                if kind == 'edit':
+                    if self._journal is not None:
+                        self._journal.write(json.dumps({'e': job[1]}) + '\n')
+                elif kind == 'reset':
+                    self._start_journal('file', _stamp(self.path))
+                elif kind == 'checkpoint':
+                    atomic_write(self.recover_path, job[1])
+                    self._start_journal('recover', _stamp(self.recover_path))
+                elif kind == 'save':
+                    atomic_write(self.path, job[1])
+                    self._start_journal('file', _stamp(self.path))
+                    if os.path.exists(self.recover_path):
+                        os.unlink(self.recover_path)
+                    self.results.put(('saved', job[2]))
+                elif kind == 'close':
+                    if self._journal is not None:
+                        self._journal.close()
+                    if not job[1]:
+                        discard_recovery(self.path)
+                    return
+            except OSError as e:
+                if kind == 'save':
+                    self.results.put(('error', e))
+            if self._jobs.empty() and self._journal is not None:
+                self._journal.flush()
+                os.fsync(self._journal.fileno())
@@ -7,98 +7,126 @@ __version__ = "0.0.1"
 ####    Imports    ####
 
 from osBoot import *
-from time import sleep
 import os
 import time
 import sys
-import random
-from random import randint
 
 
 ####    Variables    ####
 
 userInput = ""
 
+BASE_DELAY = 0.6     # starting delay between lines
+MIN_DELAY = 0.3      # fastest delay
+ACCELERATION = 0.92  # higher = slower acceleration (0.92 = 8% faster each line)
+BLANK_DELAY = 0.1
+TYPEWRITER_DELAY = 0.01  # per character
+TYPEWRITER_PAUSE = 0.5
 
-####    Classes    ####
+PACING_ENV = "SDOS_BOOT_PACING"
 
+FRAME_TIME = 1 / 60  # waits shorter than this are merged into the next frame
 
 
-####    Functions    ####
+####    Classes    ####
 
-def animate_dots(full_line, delay=0.1):
-    # Split the line into left, dots, and right text
-    if "..." in full_line:
-        # Find the index where dots begin
-        dot_start = full_line.find(".")
-        left_part = full_line[:dot_start].rstrip()
-        right_part = full_line[dot_start:].lstrip()
-
-        # Determine number of dots (count consecutive '.'s)
-        dot_count = 0
-        for c in right_part:
-            if c == '.':
-                dot_count += 1
-            else:
-                break
-
-        # Separate the trailing text (after dots)
-        trailing_text = right_part[dot_count:].strip()
-
-        # Animate dots
-        sys.stdout.write(left_part + " ")
-        sys.stdout.flush()
-        for i in range(dot_count):
-            sys.stdout.write(".")
-            sys.stdout.flush()
+class BootRenderer:
+    """Collects boot output and writes it once per frame.
+
+    wait() marks the end of a frame. The delays are kept on a running
+    deadline, so many short waits add up to one write and one sleep instead
+    of a flush per character, and slow terminals do not stretch the boot.
+    With a scale of 0 nothing waits and the whole boot is a single write.
+    """
+    def __init__(self, out=None, scale=1.0):
+        self.out = out or sys.stdout
+        self.scale = scale
+        self._pending = []
+        self._deadline = time.monotonic()
+
+    def write(self, text):
+        self._pending.append(text)
+
+    def wait(self, seconds):
+        if self.scale <= 0:
+            return
+        now = time.monotonic()
+        self._deadline = max(self._deadline, now - FRAME_TIME) + seconds * self.scale
+        delay = self._deadline - now
+        if delay >= FRAME_TIME:
+            self.flush()
             time.sleep(delay)
-        sys.stdout.write(" " + trailing_text + "\n")
-        sys.stdout.flush()
-    else:
-        print(full_line)
 
+    def flush(self):
+        if self._pending:
+            self.out.write("".join(self._pending))
+            self.out.flush()
+            self._pending.clear()
 
-def bootUp():
-    os.system("cls" if os.name == "nt" else "clear")
 
-    base_delay = 0.6   # starting delay between lines
-    min_delay = 0.3  # fastest delay
-    acceleration = 0.92  # higher = slower acceleration (0.92 = 8% faster each line)
+####    Functions    ####
 
-    for line in osBootSequence:
-        if not line.strip():
-            print()
-            time.sleep(0.1)
+def clear_screen(renderer):
+    if os.name == "nt":
+        renderer.flush()
+        os.system("cls")
+    else:
+        renderer.write("\033[2J\033[H")
+
+
+def bootUp(pacing=None, steps=None, out=None):
+    """Plays the boot script with "instant", "accelerated" or "authentic"
+    pacing; by default the one from $SDOS_BOOT_PACING or osBoot.json."""
+    if pacing is None:
+        pacing = os.environ.get(PACING_ENV) or bootPacing
+        if pacing not in PACING:
+            # a typo in the environment should not keep SDOS from starting;
+            # the script's own pacing was checked when it was loaded
+            print(f"Warning: ignoring {PACING_ENV}={pacing!r}, expected one of: {', '.join(PACING)}",
+                  file=sys.stderr)
+            pacing = bootPacing
+    if pacing not in PACING:
+        raise ValueError(f"unknown boot pacing {pacing!r}, expected one of: {', '.join(PACING)}")
+    r = BootRenderer(out, PACING[pacing])
+    clear_screen(r)
+
+    base_delay = BASE_DELAY
+    for step in bootSteps if steps is None else steps:
+        kind = step["type"]
+        if kind == "pause":
+            r.wait(step["seconds"])
+            continue
+
+        if kind == "line" and not step["text"].strip():
+            r.write("\n")
+            r.wait(BLANK_DELAY)
             continue
 
-        if "POST COMPLETE" in line:
-            for char in line:
-                print(char, end="", flush=True)
-                time.sleep(0.01)
-            print("\n")
-            time.sleep(0.5)
-
-        elif "..." in line or "....." in line:
-            # Animate dots within the line
-            animate_dots(line, delay=max(0.02, base_delay / 4))
-            time.sleep(base_delay / 2)
+        if kind == "typewriter":
+            for char in step["text"]:
+                r.write(char)
+                r.wait(TYPEWRITER_DELAY)
+            r.write("\n\n")
+            r.wait(TYPEWRITER_PAUSE)
+
+        elif kind == "dots":
+            r.write(step["label"] + " ")
+            for _ in range(step["dots"]):
+                r.write(".")
+                r.wait(max(0.02, base_delay / 4))
+            r.write(" " + step["result"] + "\n")
+            r.wait(base_delay / 2)
         else:
-            print(line)
-            time.sleep(base_delay)
+            r.write(step["text"] + "\n")
+            r.wait(base_delay)
 
         # Speed up each line
-        base_delay = max(min_delay, base_delay * acceleration)
-
-
-####    Code    ####
-
-bootUp()
-
-   
-
-
-
+        base_delay = max(MIN_DELAY, base_delay * ACCELERATION)
 
+    r.flush()
 
 
+####    Code    ####
 
+if __name__ == "__main__":
+    bootUp()
@@ -8,34 +8,24 @@ from random import randint
 import time
 import os
 import curses
+from adventure import World, WorldError, play
+from leaderboard import get_leaderboard
+from vscreen import VirtualScreen
 
-def save_score(name, score, filename="leaderboard.txt"):
-    """Saves the player's name and score to the leaderboard file."""
-    with open(filename, "a") as f:
-        f.write(f"{name}:{score}\n")
+LEADERBOARD_SIZE = 10  # scores listed after a game
+
+def save_score(name, score, game="snake"):
+    """Saves the player's name and score to the leaderboard."""
+    get_leaderboard().add(name, score, game)
     print("Score saved!")
 
-def display_leaderboard(filename="leaderboard.txt"):
-    """Reads and displays the leaderboard in the console after the game."""
+def display_leaderboard(game="snake", limit=LEADERBOARD_SIZE):
+    """Displays the top scores in the console after the game."""
     print("\n--- Leaderboard ---")
-    if not os.path.exists(filename):
-        print("No leaderboard data found.")
-        return
-
-    scores = []
-    with open(filename, "r") as f:
-        for line in f:
-            try:
-                name, score_str = line.strip().split(':')
-                score = int(score_str)
-                scores.append((name, score))
-            except ValueError:
-                continue
-
-    sorted_scores = sorted(scores, key=lambda item: item[1], reverse=True)
-
-    if sorted_scores:
-        for i, (name, score) in enumerate(sorted_scores, 1):
+    top_scores = get_leaderboard().top(limit, game)
+
+    if top_scores:
+        for i, (name, score) in enumerate(top_scores, 1):
             print(f"{i}. {name}: {score}")
     else:
         print("No scores found.")
@@ -68,98 +58,112 @@ def games_menu():
 
 # ---------- Game 1: Snake ---------- #
 
+# Seconds per simulation step for each speed level (1 = slowest).
+SNAKE_SPEEDS = {1: 0.20, 2: 0.15, 3: 0.10, 4: 0.07, 5: 0.05}
+DEFAULT_SNAKE_SPEED = 3
+# How many missed steps the loop may replay after a slow frame before it
+# gives up and resynchronises with the clock.
+MAX_CATCHUP_STEPS = 5
+# Turns typed faster than the tick rate are queued, up to this many.
+MAX_QUEUED_TURNS = 2
+
 def show_leaderboard_in_game(window):
     """
-    Pauses the game to display the leaderboard within the curses window.
+    Pauses the game to display the leaderboard within a VirtualScreen.
+
+    The game screen is saved first and restored afterwards, so resuming
+    only repaints the cells the leaderboard covered.
     """
-    window.clear()  # Clear the game screen
+    saved = window.save()
+    window.erase()
     sh, sw = window.getmaxyx()  # Get screen dimensions
 
     window.addstr(1, sw // 2 - 8, "--- Leaderboard ---")
 
-    filename = "leaderboard.txt"
-    if not os.path.exists(filename):
-        window.addstr(3, sw // 2 - 12, "No leaderboard data found.")
+    # Display top scores, making sure not to go off-screen
+    top_scores = get_leaderboard().top(max(0, sh - 6), "snake")
+    if top_scores:
+        for i, (name, score) in enumerate(top_scores, 1):
+            display_string = f"{i}. {name}: {score}"
+            window.addstr(3 + i, sw // 2 - len(display_string) // 2, display_string)
     else:
-        scores = []
-        with open(filename, "r") as f:
-            for line in f:
-                try:
-                    name, score_str = line.strip().split(':')
-                    score = int(score_str)
-                    scores.append((name, score))
-                except ValueError:
-                    continue
-
-        sorted_scores = sorted(scores, key=lambda item: item[1], reverse=True)
-
-        if sorted_scores:
-            # Display top scores, making sure not to go off-screen
-            max_scores_to_show = min(len(sorted_scores), sh - 6)
-            for i, (name, score) in enumerate(sorted_scores[:max_scores_to_show], 1):
-                display_string = f"{i}. {name}: {score}"
-                window.addstr(3 + i, sw // 2 - len(display_string) // 2, display_string)
-        else:
-            window.addstr(3, sw // 2 - 8, "No scores found.")
+        window.addstr(3, sw // 2 - 8, "No scores found.")
 
     window.addstr(sh - 2, sw // 2 - 12, "Press 'z' to resume game")
-    window.refresh()
 
     # Wait until 'z' is pressed again to exit the leaderboard view
+    window.timeout(-1)
     while True:
         key = window.getch()
         if key == ord('z'):
             break
 
-    window.clear()  # Clear the leaderboard screen before returning to the game
+    window.restore(saved)
+    window.flush()
 
-def snake():
-    """Wrapper function to handle the snake game and its score."""
-    final_score = 0
-
-    def main(stdscr):
-        nonlocal final_score
-        opposite_directions = {
-            curses.KEY_UP: curses.KEY_DOWN,
-            curses.KEY_DOWN: curses.KEY_UP,
-            curses.KEY_LEFT: curses.KEY_RIGHT,
-            curses.KEY_RIGHT: curses.KEY_LEFT
-        }
-
-        curses.curs_set(0)
-        sh, sw = stdscr.getmaxyx()
-        w = curses.newwin(sh, sw, 0, 0)
-        w.keypad(1)
-        w.timeout(100)
-        score = 0
-        
-        snake = [[sh//2, sw//4], [sh//2, sw//4-1], [sh//2, sw//4-2]]
-        food = [sh//2, sw//2]
-        w.addch(food[0], food[1], curses.ACS_PI)
+def snake_game(screen, speed=DEFAULT_SNAKE_SPEED):
+    """
+    Plays Snake on a VirtualScreen and returns the score.
 
-        key = curses.KEY_RIGHT
+    The simulation advances on screen.clock() in fixed steps, so a headless
+    screen with queued keys plays (and benchmarks) the game without a TTY.
+    """
+    opposite_directions = {
+        curses.KEY_UP: curses.KEY_DOWN,
+        curses.KEY_DOWN: curses.KEY_UP,
+        curses.KEY_LEFT: curses.KEY_RIGHT,
+        curses.KEY_RIGHT: curses.KEY_LEFT
+    }
+    # ACS glyphs only exist once curses is initialised
+    food_glyph = getattr(curses, 'ACS_PI', '*')
+    body_glyph = getattr(curses, 'ACS_CKBOARD', '#')
+
+    sh, sw = screen.getmaxyx()
+    score = 0
+
+    snake = [[sh//2, sw//4], [sh//2, sw//4-1], [sh//2, sw//4-2]]
+    food = [sh//2, sw//2]
+    screen.addch(food[0], food[1], food_glyph)
+    for part in snake:
+        screen.addch(part[0], part[1], body_glyph)
+
+    key = curses.KEY_RIGHT
+    turns = []  # direction changes waiting for the next step
+
+    next_tick = screen.clock() + SNAKE_SPEEDS[speed]
 
-        while True:
-            w.addstr(0, 2, f"Score: {score} ")
-            
-            key_press = w.getch()
+    while True:
+        # --- input: poll until the next simulation step is due ---
+        now = screen.clock()
+        if now < next_tick:
+            screen.timeout(max(1, int((next_tick - now) * 1000)))
+            key_press = screen.getch()
 
             if key_press == ord('z'):
                 # Pause the game and show the leaderboard
-                show_leaderboard_in_game(w)
-                
-                # After returning, redraw the entire game state to resume
-                w.addch(food[0], food[1], curses.ACS_PI)
-                for part in snake:
-                    w.addch(part[0], part[1], curses.ACS_CKBOARD)
-
+                show_leaderboard_in_game(screen)
+                next_tick = screen.clock() + SNAKE_SPEEDS[speed]
             elif key_press == ord('x'):
-                final_score = score
-                break
+                return score
+            elif key_press in (ord('+'), ord('=')):
+                speed = min(speed + 1, max(SNAKE_SPEEDS))
+            elif key_press == ord('-'):
+                speed = max(speed - 1, min(SNAKE_SPEEDS))
             # Only change direction if a valid arrow key was pressed
-            elif key_press in [curses.KEY_UP, curses.KEY_DOWN, curses.KEY_LEFT, curses.KEY_RIGHT]:
-                 if key_press != opposite_directions.get(key):
-                    key = key_press
+            elif key_press in opposite_directions and len(turns) < MAX_QUEUED_TURNS:
+                last = turns[-1] if turns else key
+                if key_press not in (last, opposite_directions[last]):
+                    turns.append(key_press)
+            continue
+
+        # --- simulation: fixed timestep, catching up after slow frames ---
+        game_over = False
+        steps = 0
+        while next_tick <= now and steps < MAX_CATCHUP_STEPS:
+            next_tick += SNAKE_SPEEDS[speed]
+            steps += 1
+            if turns:
+                key = turns.pop(0)
 
             head = snake[0]
             new_head = head[:]
@@ -176,11 +180,7 @@ def snake():
             if (new_head in snake
                 or new_head[0] < 1 or new_head[0] >= sh-1
                 or new_head[1] < 1 or new_head[1] >= sw-1):
-                msg = f"GAME OVER! Your Score: {score}"
-                w.addstr(sh//2, sw//2 - len(msg)//2, msg)
-                w.refresh()
-                time.sleep(2)
-                final_score = score
+                game_over = True
                 break
 
             snake.insert(0, new_head)
@@ -191,14 +191,40 @@ def snake():
                 while food is None:
                     nf = [randint(1, sh-2), randint(1, sw-2)]
                     food = nf if nf not in snake else None
-                w.addch(food[0], food[1], curses.ACS_PI)
+                screen.addch(food[0], food[1], food_glyph)
             else:
                 tail = snake.pop()
-                w.addch(tail[0], tail[1], ' ')
+                screen.addch(tail[0], tail[1], ' ')
+
+            screen.addch(new_head[0], new_head[1], body_glyph)
+
+        if next_tick <= now:
+            # Too far behind to catch up; drop the backlog
+            next_tick = now + SNAKE_SPEEDS[speed]
+
+        # --- render: the screen sends only changed cells, in one update ---
+        screen.addstr(0, 2, f"Score: {score}  Speed: {speed} ")
+
+        if game_over:
+            msg = f"GAME OVER! Your Score: {score}"
+            screen.addstr(sh//2, sw//2 - len(msg)//2, msg)
+            screen.sleep(2)
+            return score
+
+        screen.flush()
+
+def snake():
+    """Wrapper function to handle the snake game and its score."""
+    final_score = 0
+
+    def main(stdscr):
+        nonlocal final_score
+        curses.curs_set(0)
+        sh, sw = stdscr.getmaxyx()
+        w = curses.newwin(sh, sw, 0, 0)
+        w.keypad(1)
+        final_score = snake_game(VirtualScreen(w))
 
-            w.addch(new_head[0], new_head[1], curses.ACS_CKBOARD)
-            w.refresh()
-            
     curses.wrapper(main)
 
     print(f"\nGame Over! Final score: {final_score}")
@@ -212,18 +238,22 @@ def snake():
     input("\nPress Enter to return to the main menu...")
 
 # ---------- Game 2: Text Adventure ---------- #
-def text_adventure():
+ADVENTURE_WORLD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mini_adventure.jsonl")
+
+def text_adventure(world_file=ADVENTURE_WORLD):
+    """Plays a text adventure world; see adventure.py for the file format."""
     os.system("cls" if os.name == "nt" else "clear")
-    print("=== MINI TEXT ADVENTURE ===")
-    print("You wake up in a small room. There's a door and a window.\n")
-
-    choice = input("Do you go to the (D)oor or (W)indow? ").lower().strip()
-    if choice == "d":
-        print("The door creaks open... you escape to freedom!")
-    elif choice == "w":
-        print("You climb out the window and fall into a bush. Ouch!")
+    try:
+        world = World(world_file)
+    except (OSError, WorldError) as e:
+        print(f"Cannot open the adventure: {e}")
     else:
-        print("You stand still... and time passes slowly.")
+        try:
+            play(world)
+        except WorldError as e:
+            print(f"\nThe adventure is broken: {e}")
+        finally:
+            world.close()
     input("\nPress Enter to return to menu...")
 
 if __name__ == '__main__':
@@ -0,0 +1,66 @@
+"""
+name: "hibernate"
+description: "Snapshot files for SDOS hibernate/resume"
+author: "martinP"
+
+A snapshot is a header line naming the format version, followed by the
+machine state as zlib-compressed JSON. Snapshots are written to a
+temporary file that is renamed over the old one, so an interrupted
+HIBERNATE never leaves a half-written snapshot behind.
+"""
+import json
+import os
+import tempfile
+import zlib
+
+SNAPSHOT_FILE = "SDOS.hibernate"
+SNAPSHOT_MAGIC = b"SDOS-HIBERNATE"
+SNAPSHOT_VERSION = 1
+
+
+class SnapshotError(Exception):
+    """The snapshot is missing, damaged or from another format version."""
+
+
+def save_snapshot(state, path=SNAPSHOT_FILE):
+    """Writes `state` (plain JSON data) atomically to `path`."""
+    header = SNAPSHOT_MAGIC + b" %d\n" % SNAPSHOT_VERSION
+    body = zlib.compress(json.dumps(state, separators=(",", ":")).encode("utf-8"))
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix=".sdos-")
+    try:
+        with open(fd, "wb") as f:
+            f.write(header)
+            f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def load_snapshot(path=SNAPSHOT_FILE):
+    """Returns the state stored in a snapshot, or raises SnapshotError."""
+    try:
+        with open(path, "rb") as f:
+            header = f.readline()
+            body = f.read()
+    except OSError as e:
+        raise SnapshotError(f"cannot read {path}: {e.strerror}") from e
+    magic, _, version = header.strip().partition(b" ")
+    if magic != SNAPSHOT_MAGIC:
+        raise SnapshotError(f"{path} is not an SDOS snapshot")
+    if version != b"%d" % SNAPSHOT_VERSION:
+        raise SnapshotError(f"{path} has unsupported snapshot version {version.decode(errors='replace')}")
+    try:
+        return json.loads(zlib.decompress(body).decode("utf-8"))
+    except (zlib.error, ValueError) as e:
+        raise SnapshotError(f"{path} is damaged") from e
+
+
+def discard_snapshot(path=SNAPSHOT_FILE):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,164 @@
+"""
+name: "leaderboard"
+description: "Indexed score store for the SDOS games pack"
+author: "martinP"
+
+Scores live in a small SQLite database with an index on (game, score), so
+inserts are O(log n) and the top K rows are read straight off the index.
+The best scores of each game are also cached in memory, which keeps the
+in-game leaderboard (Snake's 'z' pause) free of any disk access.
+"""
+import bisect
+import os
+import sqlite3
+import time
+
+DEFAULT_DB = "leaderboard.db"
+LEGACY_FILE = "leaderboard.txt"
+DEFAULT_GAME = "snake"
+
+CACHE_SIZE = 100      # best scores kept in memory per game
+COMPACT_KEEP = 1000   # scores kept per game when the store is compacted
+COMPACT_EVERY = 500   # inserts between automatic compactions
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id      INTEGER PRIMARY KEY,
+    game    TEXT NOT NULL,
+    name    TEXT NOT NULL,
+    score   INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_by_game ON scores (game, score DESC, id);
+CREATE INDEX IF NOT EXISTS scores_by_name ON scores (name, game, score DESC);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class Leaderboard:
+    """Persistent leaderboard with cached top-K queries."""
+    def __init__(self, path=DEFAULT_DB, legacy_file=LEGACY_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        self._top = {}  # game -> [(-score, id, name)] best first, at most CACHE_SIZE
+        self._complete = {}  # game -> True when the cache holds every score
+        if legacy_file:
+            self.import_legacy(legacy_file)
+
+    def import_legacy(self, filename=LEGACY_FILE, game=DEFAULT_GAME):
+        """One-time import of an old `name:score` text leaderboard."""
+        if self._get_meta("legacy_imported") or not os.path.exists(filename):
+            return 0
+
+        rows = []
+        now = time.time()
+        with open(filename, "r") as f:
+            for line in f:
+                try:
+                    name, score_str = line.strip().split(':')
+                    rows.append((game, name, int(score_str), now))
+                except ValueError:
+                    continue
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO scores (game, name, score, created) VALUES (?, ?, ?, ?)", rows)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_imported', ?)",
+                (os.path.abspath(filename),))
+        self._top.pop(game, None)
+        return len(rows)
+
+    def add(self, name, score, game=DEFAULT_GAME):
+        """Records a score; compacts the store every COMPACT_EVERY inserts.
+
+        The insert count is kept in the database, so short sessions that
+        each add a score or two still add up to a compaction.
+        """
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO scores (game, name, score, created) VALUES (?, ?, ?, ?)",
+                (game, name, int(score), time.time()))
+            inserts = int(self._get_meta("inserts_since_compact") or 0) + 1
+            self._set_meta("inserts_since_compact", inserts)
+
+        if game in self._top:
+            cache = self._top[game]
+            bisect.insort(cache, (-int(score), cur.lastrowid, name))
+            if len(cache) > CACHE_SIZE:
+                cache.pop()
+                self._complete[game] = False
+
+        if inserts >= COMPACT_EVERY:
+            self.compact()
+
+    def top(self, k=10, game=DEFAULT_GAME):
+        """Returns the best `k` scores of a game as (name, score) pairs."""
+        if game not in self._top:
+            self._load_top(game)
+        cache = self._top[game]
+        if k > len(cache) and not self._complete[game]:
+            rows = self.conn.execute(
+                "SELECT name, score FROM scores WHERE game = ? "
+                "ORDER BY score DESC, id LIMIT ?", (game, k))
+            return rows.fetchall()
+        return [(name, -neg) for neg, _, name in cache[:k]]
+
+    def player_scores(self, name, game=None, limit=10):
+        """Returns a player's best scores as (game, score) pairs."""
+        if game is None:
+            rows = self.conn.execute(
+                "SELECT game, score FROM scores WHERE name = ? "
+                "ORDER BY score DESC LIMIT ?", (name, limit))
+        else:
+            rows = self.conn.execute(
+                "SELECT game, score FROM scores WHERE name = ? AND game = ? "
+                "ORDER BY score DESC LIMIT ?", (name, game, limit))
+        return rows.fetchall()
+
+    def games(self):
+        """Lists the games that have recorded scores."""
+        return [row[0] for row in self.conn.execute("SELECT DISTINCT game FROM scores")]
+
+    def compact(self, keep=COMPACT_KEEP):
+        """Drops everything but the best `keep` scores of each game."""
+        with self.conn:
+            for game in self.games():
+                self.conn.execute(
+                    "DELETE FROM scores WHERE id IN ("
+                    "SELECT id FROM scores WHERE game = ? "
+                    "ORDER BY score DESC, id LIMIT -1 OFFSET ?)", (game, keep))
+            self._set_meta("inserts_since_compact", 0)
+        self.conn.execute("VACUUM")
+        self._top.clear()
+
+    def close(self):
+        self.conn.close()
+
+    def _load_top(self, game):
+        rows = self.conn.execute(
+            "SELECT id, name, score FROM scores WHERE game = ? "
+            "ORDER BY score DESC, id LIMIT ?", (game, CACHE_SIZE + 1)).fetchall()
+        self._complete[game] = len(rows) <= CACHE_SIZE
+        self._top[game] = [(-score, row_id, name) for row_id, name, score in rows[:CACHE_SIZE]]
+
+    def _get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+
+_leaderboard = None
+
+def get_leaderboard():
+    """Returns the shared leaderboard, opening it on first use."""
+    global _leaderboard
+    if _leaderboard is None:
+        _leaderboard = Leaderboard()
+    return _leaderboard
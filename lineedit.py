@@ -0,0 +1,263 @@
+"""
+name: "lineedit"
+description: "Command line editing for the SDOS prompt"
+author: "martinP"
+
+LineEditor reads commands through GNU readline when it is available:
+arrow-key history that persists between sessions, reverse search with
+Ctrl-R and Tab completion. Without readline it falls back to input() and
+only keeps the history file.
+
+Completion is served by DosCompleter from one PrefixTrie for the command
+names and, per directory of the virtual file system, one for each kind of
+argument: its subdirectories and its files with a given extension. A trie
+is built the first time its directory is completed in and then kept up to
+date through add_entry()/remove_entry(), so a lookup only walks the typed
+prefix and the matches instead of scanning the directory listing.
+"""
+import os
+import re
+
+try:
+    import readline
+except ImportError:  # e.g. Windows without pyreadline
+    readline = None
+
+HISTORY_FILE = os.path.join(os.path.expanduser("~"), ".sdos_history")
+HISTORY_SIZE = 1000
+COMPLETION_LIMIT = 500  # matches offered for one Tab
+
+_WORD = None  # trie node key holding the word that ends there
+_ANSI = re.compile(r"(\x1b\[[0-9;]*m)")
+
+
+class PrefixTrie:
+    """A case-insensitive set of words that lists the words with a prefix."""
+    def __init__(self, words=()):
+        self._root = {}
+        self._size = 0
+        for word in words:
+            self.add(word)
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, word):
+        node = self._find(word.upper())
+        return node is not None and _WORD in node
+
+    def add(self, word):
+        node = self._root
+        for ch in word.upper():
+            node = node.setdefault(ch, {})
+        if _WORD not in node:
+            self._size += 1
+        node[_WORD] = word
+
+    def discard(self, word):
+        key = word.upper()
+        path = [self._root]
+        for ch in key:
+            node = path[-1].get(ch)
+            if node is None:
+                return
+            path.append(node)
+        if path[-1].pop(_WORD, None) is None:
+            return
+        self._size -= 1
+        # prune the branch that only led to this word
+        for i in range(len(key), 0, -1):
+            if path[i]:
+                break
+            del path[i - 1][key[i - 1]]
+
+    def complete(self, prefix, limit=None):
+        """Returns the words starting with `prefix` in sorted order."""
+        node = self._find(prefix.upper())
+        if node is None:
+            return []
+        out = []
+        stack = [node]
+        while stack and (limit is None or len(out) < limit):
+            node = stack.pop()
+            if _WORD in node:
+                out.append(node[_WORD])
+            stack.extend(node[ch] for ch in sorted((ch for ch in node if ch is not _WORD), reverse=True))
+        return out
+
+    def _find(self, key):
+        node = self._root
+        for ch in key:
+            node = node.get(ch)
+            if node is None:
+                return None
+        return node
+
+
+class DosCompleter:
+    """Completes SDOS command names and paths of a FILES-style tree.
+
+    `files` maps directory paths ("C:\\", "C:\\GAMES") to lists of
+    (name, size, ...) entries; directories have the size "<DIR>".
+    """
+    def __init__(self, commands, files, cwd, arguments=None):
+        self.commands = PrefixTrie(commands)
+        self.files = files
+        self.cwd = cwd  # callable returning the current directory
+        # command -> "dirs" (directory paths) or a file extension such as
+        # ".SDOS" (names of such files in the current directory); other
+        # commands get no completion
+        self.arguments = arguments or {}
+        self._dirs = {}
+
+    def complete(self, line, token):
+        """Returns the completions of `token`, the last word of `line`."""
+        before = line[:len(line) - len(token)]
+        if not before.strip():
+            return [name + " " for name in self.commands.complete(token, COMPLETION_LIMIT)]
+        kind = self.arguments.get(before.split()[0].upper())
+        if kind is None:
+            return []
+        if kind != "dirs":
+            if "\\" in token or ":" in token:
+                return []
+            return [m + " " for m in self._trie(self.cwd(), kind).complete(token, COMPLETION_LIMIT)]
+        base, rel = self._base(token)
+        head, _, partial = rel.rpartition("\\")
+        directory = self._resolve(base, head)
+        if directory is None:
+            return []
+        prefix = token[:len(token) - len(partial)]
+        return [prefix + m for m in self._trie(directory, kind).complete(partial, COMPLETION_LIMIT)]
+
+    def resolve(self, path):
+        """Returns the FILES key of a directory path, or None if there is none."""
+        return self._resolve(*self._base(path))
+
+    def add_entry(self, directory, name, is_dir=False):
+        """Tells the completer a file or directory was created."""
+        for kind, trie in self._dirs.get(directory, {}).items():
+            if _accepts(kind, name, is_dir):
+                trie.add(name + "\\" if is_dir else name)
+
+    def remove_entry(self, directory, name, is_dir=False):
+        for kind, trie in self._dirs.get(directory, {}).items():
+            if _accepts(kind, name, is_dir):
+                trie.discard(name + "\\" if is_dir else name)
+
+    def invalidate(self, directory=None):
+        """Forgets one directory (or all) after FILES was replaced wholesale."""
+        if directory is None:
+            self._dirs.clear()
+        else:
+            self._dirs.pop(directory, None)
+
+    def _trie(self, directory, kind):
+        tries = self._dirs.setdefault(directory, {})
+        trie = tries.get(kind)
+        if trie is None:
+            entries = ((name, size == "<DIR>") for name, size, *_ in self.files.get(directory, []))
+            trie = tries[kind] = PrefixTrie(
+                name + "\\" if is_dir else name
+                for name, is_dir in entries if _accepts(kind, name, is_dir))
+        return trie
+
+    def _base(self, path):
+        """Splits a path into the directory it starts from and the rest."""
+        if path[1:2] == ":":
+            return path[:2].upper() + "\\", path[2:]
+        if path.startswith("\\"):
+            return self.cwd()[:3], path
+        return self.cwd(), path
+
+    def _resolve(self, base, rel):
+        path = base
+        for part in rel.split("\\"):
+            if part in ("", "."):
+                continue
+            if part == "..":
+                if not path.endswith(":\\"):
+                    path = path.rsplit("\\", 1)[0]
+                    if path.endswith(":"):
+                        path += "\\"
+                continue
+            path = path.rstrip("\\") + "\\" + part.upper()
+        return path if path in self.files else None
+
+
+def _accepts(kind, name, is_dir):
+    """Whether an entry belongs in the trie of one kind of argument."""
+    if kind == "dirs":
+        return is_dir
+    return not is_dir and name.upper().endswith(kind)
+
+
+class LineEditor:
+    """Reads command lines with history and completion."""
+    def __init__(self, completer=None, history_file=HISTORY_FILE, history_size=HISTORY_SIZE):
+        self.completer = completer
+        self.history_file = history_file
+        self.history_size = history_size
+        self._matches = []
+        if readline is not None:
+            self._setup_readline()
+
+    def read(self, prompt=""):
+        """Like input(): returns the line, raises EOFError/KeyboardInterrupt."""
+        if readline is None:
+            line = input(prompt)
+            self._append_history(line)
+            return line
+        # readline must not count colour codes towards the prompt width
+        line = input(_ANSI.sub("\001\\1\002", prompt))
+        length = readline.get_current_history_length()
+        if line.strip() and (not length or readline.get_history_item(length) != line):
+            readline.add_history(line)
+            self._append_history(line)
+        return line
+
+    def _setup_readline(self):
+        if "libedit" in (readline.__doc__ or ""):
+            readline.parse_and_bind("bind ^I rl_complete")
+        else:
+            readline.parse_and_bind("tab: complete")
+        readline.set_auto_history(False)  # read() skips blanks and repeats
+        readline.set_completer_delims(" \t")
+        readline.set_completer(self._complete)
+        readline.set_history_length(self.history_size)
+        try:
+            readline.read_history_file(self.history_file)
+        except OSError:
+            return
+        if readline.get_current_history_length() >= self.history_size:
+            # the file only ever grows by appending; trim it now and then
+            self._write_history()
+
+    def _complete(self, text, state):
+        if state == 0:
+            line = readline.get_line_buffer()[:readline.get_endidx()]
+            try:
+                self._matches = self.completer.complete(line, text) if self.completer else []
+            except Exception:
+                self._matches = []  # readline swallows errors silently anyway
+        return self._matches[state] if state < len(self._matches) else None
+
+    def _append_history(self, line):
+        if not line.strip():
+            return
+        try:
+            if readline is not None and os.path.exists(self.history_file):
+                readline.append_history_file(1, self.history_file)
+            elif readline is not None:
+                readline.write_history_file(self.history_file)
+            else:
+                with open(self.history_file, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+        except OSError:
+            pass
+
+    def _write_history(self):
+        try:
+            readline.write_history_file(self.history_file)
+        except OSError:
+            pass
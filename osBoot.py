@@ -1,61 +1,68 @@
-osBootSequence = [
-    "PERSONAL COMPUTER SYSTEM",
-    "ROM BIOS VERSION 2.43.07 COPYRIGHT (C) 1987-1996 CC INDUSTRIES",
-    "------------------------------------------------------------",
-    "SYSTEM MEMORY TESTING .................... 640K OK",
-    "EXTENDED MEMORY CHECK .................... 16384K OK",
-    "CACHE MEMORY ............................. ENABLED",
-    "KEYBOARD CONTROLLER ...................... OK",
-    "FLOPPY DRIVE A: 3.5\" 1.44MB .............. OK",
-    "FLOPPY DRIVE B: 5.25\" 1.2MB .............. NOT FOUND",
-    "HARD DISK 0: CC 512MB IDE ............ OK",
-    "HARD DISK 1: NOT DETECTED",
-    "CD-ROM DRIVE D: .......................... OK",
-    "PARALLEL PORT LPT1 ....................... OK",
-    "SERIAL PORTS COM1 COM2 ................... OK",
-    "VIDEO ADAPTER: CC VGA PLUS ........... OK",
-    "VIDEO MEMORY: 1024K DETECTED",
-    "MOUSE DEVICE ............................. OK",
-    "DMA CONTROLLERS ......................... OK",
-    "CMOS BATTERY STATUS ..................... GOOD",
-    "SYSTEM CLOCK ............................ 14.318 MHZ",
-    "POST COMPLETE. NO ERRORS FOUND.",
-    "",
-    "CC BOOT MANAGER v1.22",
-    "SCANNING FOR BOOTABLE DEVICES...",
-    " - DRIVE A: NO SYSTEM DISK",
-    " - DRIVE C: BOOTABLE PARTITION FOUND",
-    "",
-    "LOADING CC DOS 5.3 ............",
-    "KERNEL INITIALIZATION ............. OK",
-    "INSTALLING SYSTEM DRIVERS:",
-    "  - HIMEM.SYS ..................... OK",
-    "  - EMM386.EXE .................... ENABLED",
-    "  - RICNET.SYS .................... LOADED",
-    "  - RICSND.SYS .................... OK",
-    "  - RICVGA.SYS .................... OK",
-    "",
-    "MOUNTING FILE SYSTEM ............. OK",
-    "CONFIG.SYS PARSING ............... DONE",
-    "EXECUTING AUTOEXEC.BAT ...........",
-    "PATH=C:\\CC;C:\\CC\\BIN",
-    "SET TEMP=C:\\TEMP",
-    "",
-    "LOADING KERNEL MODULES ........................... PASSED"
-    "LOADING SYSTEM"
-    "---------------------------"
-    "1. Serve the public trust"
-    "2. Protect the innocent"
-    "3. Uphold the law"
-    "4. Any attempt to arrest a senior officer of OCP results"
-    "in shutdown (Listed as [Classified] in the initial activation)"
-    "---------------------------"
-    "CC NETWORK DRIVER INITIALIZED.",
-    "CC VGA PLUS DRIVER ACTIVE.",
-    "SYSTEM TIME: 07:42:36  TUE 10/14/25",
-    "------------------------------------------------------------",
-    "CC OPERATING SYSTEM v5.3.12",
-    "COPYRIGHT (C) 1987-2025 CC INDUSTRIES",
-    "ALL RIGHTS RESERVED.",
-    "\n\n",
-]
+"""
+name: "osBoot"
+description: "Loads the SDOS boot script"
+author: "martinP"
+
+The boot script lives in osBoot.json as a list of typed steps:
+
+    {"type": "line", "text": "..."}                 print a line ("" = blank)
+    {"type": "dots", "label": "...", "dots": 20, "result": "OK"}
+                                                    label, animated dots, result
+    {"type": "typewriter", "text": "..."}           print one character at a time
+    {"type": "pause", "seconds": 0.5}               wait without printing
+
+Its "pacing" (one of PACING) is the default speed. boot_sim.bootUp()
+renders the steps; osBootSequence keeps the old flat list of lines for
+code that still reads it.
+"""
+import json
+import os
+
+BOOT_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "osBoot.json")
+BOOT_SCRIPT_VERSION = 1
+
+# how much of the authentic delays each pacing keeps
+PACING = {"instant": 0.0, "accelerated": 0.25, "authentic": 1.0}
+
+STEP_FIELDS = {
+    "line": ("text",),
+    "dots": ("label", "dots", "result"),
+    "typewriter": ("text",),
+    "pause": ("seconds",),
+}
+
+
+def load_boot_script(path=BOOT_SCRIPT):
+    """Returns (default pacing, steps) read from a boot script file."""
+    with open(path, "r", encoding="utf-8") as f:
+        script = json.load(f)
+    if script.get("version") != BOOT_SCRIPT_VERSION:
+        raise ValueError(f"{path}: unsupported boot script version {script.get('version')!r}")
+    steps = script.get("steps", [])
+    for i, step in enumerate(steps):
+        fields = STEP_FIELDS.get(step.get("type"))
+        if fields is None:
+            raise ValueError(f"{path}: step {i}: unknown type {step.get('type')!r}")
+        missing = [name for name in fields if name not in step]
+        if missing:
+            raise ValueError(f"{path}: step {i}: missing {', '.join(missing)}")
+    pacing = script.get("pacing", "authentic")
+    if pacing not in PACING:
+        raise ValueError(f"{path}: unknown pacing {pacing!r}, expected one of: {', '.join(PACING)}")
+    return pacing, steps
+
+
+def step_text(step):
+    """The line a step leaves on screen, or None for a pause."""
+    kind = step["type"]
+    if kind == "dots":
+        text = f"{step['label']} {'.' * step['dots']}"
+        return f"{text} {step['result']}" if step["result"] else text
+    if kind == "pause":
+        return None
+    return step["text"]
+
+
+bootPacing, bootSteps = load_boot_script()
+
+osBootSequence = [text for text in map(step_text, bootSteps) if text is not None]
@@ -4,8 +4,19 @@ Simple curses-based editor for SBASIC files.
 Features:
 - Open and edit a file (default: `sbesic`)
 - Save (Ctrl-S), Quit (Ctrl-Q), Run with SBASIC interpreter (Ctrl-R)
+- Ctrl-R runs the buffer in-process, with output in a split pane
+- Incremental find (Ctrl-F, then Ctrl-N/Ctrl-P) and regex replace-all (Ctrl-T)
+- Undo (Ctrl-Z) and redo (Ctrl-Y) with a bounded, delta-based history
+- Saves happen in the background with atomic renames; a recovery journal
+  lets unsaved edits survive a crash (see autosave.py)
 - Basic navigation: arrows, PageUp/PageDown, Home/End
 - Basic syntax highlighting for a few SBASIC keywords
+- Piece-table buffer (see textbuffer.py), so edits stay fast in large files
+- Files are memory-mapped and indexed in the background, so large files
+  open instantly and only the lines on screen are decoded
+- Highlighting is cached per line and only changed screen rows are redrawn;
+  drawing goes through a VirtualScreen (vscreen.py), which flushes only
+  changed cells and also runs headless for tests and benchmarks
 
 Designed to be small and dependency-light. On Windows install `windows-curses`.
 """
@@ -13,38 +24,98 @@ from __future__ import annotations
 
 import curses
 import os
+import re
 import sys
-import subprocess
 import locale
-from typing import List
+from collections import OrderedDict
+from typing import List, Tuple
+
+import autosave
+from SBASIC import Interpreter, Program
+from textbuffer import MappedLines, TextBuffer
+from textsearch import SearchIndex
+from textundo import UndoLog
+from vscreen import VirtualScreen, color_pair
 
 locale.setlocale(locale.LC_ALL, '')
 
 CTRL_S = 19
 CTRL_Q = 17
 CTRL_R = 18
+CTRL_F = 6
+CTRL_N = 14
+CTRL_P = 16
+CTRL_T = 20
+CTRL_Y = 25
+CTRL_Z = 26
+ESC = 27
 
 KEYWORDS = [
     'PRINT', 'LET', 'IF', 'THEN', 'ELSE', 'GOTO', 'GOSUB', 'RETURN',
     'FOR', 'TO', 'STEP', 'NEXT', 'INPUT', 'DIM', 'END', 'REM'
 ]
 
+TOKEN_CACHE_SIZE = 4096  # highlighted lines remembered by the editor
+GUTTER_W = 6
+DEFAULT_FILENAME = 'sbesic'
+HELP = "Ctrl-S Save  Ctrl-R Run  Ctrl-F Find  Ctrl-T Replace  Ctrl-Z Undo  Ctrl-Q Quit"
+
+
+def _mark(runs: Tuple, spans: Tuple, attr: int) -> Tuple:
+    """Splits highlighted runs so that the given spans get `attr` added."""
+    out = []
+    pos = 0
+    si = 0
+    for text, run_attr in runs:
+        end = pos + len(text)
+        cut = pos
+        while si < len(spans) and spans[si][0] < end:
+            s, e = spans[si]
+            s, e = max(s, cut), min(e, end)
+            if s > cut:
+                out.append((text[cut-pos:s-pos], run_attr))
+            out.append((text[s-pos:e-pos], run_attr | attr))
+            cut = e
+            if spans[si][1] > end:
+                break
+            si += 1
+        if cut < end:
+            out.append((text[cut-pos:], run_attr))
+        pos = end
+    return tuple(out)
+
 
 class Editor:
     def __init__(self, stdscr, filename: str):
+        if not isinstance(stdscr, VirtualScreen):
+            stdscr = VirtualScreen(stdscr)
         self.stdscr = stdscr
         self.filename = filename
-        self.lines: List[str] = []
+        self.lines = TextBuffer()
         self.cursor_x = 0
         self.cursor_y = 0
         self.view_x = 0
         self.view_y = 0
         self.modified = False
         self.message = ''
+        # line text -> highlighted runs; keyed by content, so an edit to a
+        # line simply misses the cache and untouched lines never re-tokenize
+        self._tokens: 'OrderedDict[str, Tuple]' = OrderedDict()
+        # screen row -> what was drawn there last frame
+        self._rows = {}
+        self._screen_size = None
+        self._program = None  # last program run, reused by the next Ctrl-R
+        self.search = SearchIndex()
+        self.history = UndoLog()
+        self._saved_state = None  # history position matching the file on disk
+        self.autosave = None  # started by run(), once recovery is settled
+        self._saves_pending = 0
         self._init_colors()
         self.load_file()
 
     def _init_colors(self):
+        if self.stdscr.window is None:
+            return  # headless: color_pair() falls back to plain pair numbers
         curses.use_default_colors()
         if curses.has_colors():
             curses.init_pair(1, curses.COLOR_YELLOW, -1)  # keyword
@@ -54,49 +125,110 @@ class Editor:
 
     def load_file(self):
         if os.path.exists(self.filename):
-            with open(self.filename, 'r', encoding='utf-8', errors='replace') as f:
-                self.lines = [ln.rstrip('\n') for ln in f.readlines()]
+            self.lines = TextBuffer(MappedLines(self.filename))
         else:
-            self.lines = ['']
+            self.lines = TextBuffer([''])
 
     def save_file(self):
-        try:
-            with open(self.filename, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(self.lines) + '\n')
-            self.modified = False
-            self.set_message(f"Saved {self.filename}")
-        except Exception as e:
-            self.set_message(f"Save error: {e}")
+        # the autosave worker writes a snapshot of the buffer while we go on
+        self.lines.sync(wait=True)
+        if os.name == 'nt':
+            # Windows won't rename a file over one that is still mapped
+            self.lines.release_source()
+        self.autosave.save(self.lines, self.history.state())
+        self.history.seal()
+        self._saves_pending += 1
+        self.set_message(f"Saving {self.filename}...")
+
+    def _poll_autosave(self, wait=False):
+        """Takes in finished saves; with `wait`, waits for all queued ones."""
+        while self._saves_pending and (wait or not self.autosave.results.empty()):
+            result, value = self.autosave.results.get()
+            self._saves_pending -= 1
+            if result == 'saved':
+                self._saved_state = value
+                self._update_modified()
+                self.set_message(f"Saved {self.filename}")
+            else:
+                self.set_message(f"Save error: {value}")
+
+    def _offer_recovery(self):
+        changes = autosave.find_recovery(self.filename)
+        if changes is None:
+            return None
+        self.set_message(f"Recover {changes} unsaved change(s) from a crashed session? (y/n)")
+        self.draw()
+        self.stdscr.timeout(-1)
+        while True:
+            key = self.stdscr.getch()
+            if key in (ord('y'), ord('Y')):
+                self.lines.close()
+                self.lines = autosave.recover(self.filename)
+                self._saved_state = object()  # matches no point in history
+                self._update_modified()
+                self.set_message('Recovered unsaved edits - Ctrl-S to keep them')
+                return self.lines
+            if key in (ord('n'), ord('N'), ESC):
+                autosave.discard_recovery(self.filename)
+                self.set_message('')
+                return None
 
     def set_message(self, msg: str):
         self.message = msg
 
     def run_file(self):
-        # Run SBASIC interpreter (sbesic.py) with the current file
-        interp = os.path.join(os.path.dirname(__file__), 'sbesic.py')
-        if not os.path.exists(interp):
-            self.set_message('sbesic.py not found in project root')
-            return
+        # Run the buffer (saved or not) with the S-BASIC interpreter; the
+        # parsed program is kept and only changed lines are re-parsed
+        self.lines.sync(wait=True)
+        if self._program is None:
+            self._program = Program(self.lines)
+        else:
+            self._program = self._program.update(self.lines)
+
+        # output goes to a pane over the lower half of the screen
+        rows, cols = self.stdscr.getmaxyx()
+        pane_h = max(3, rows // 2)
+        pane = self.stdscr.newwin(pane_h, cols, rows - pane_h, 0)
+        pane.keypad(True)
+        pane.scrollok(True)
+        # let Ctrl-C interrupt a runaway script
+        headless = self.stdscr.window is None
+        if not headless:
+            curses.noraw()
+            curses.cbreak()
         try:
-            # flush to make sure file saved first
-            if self.modified:
-                self.save_file()
-            self.set_message('Running... (output in terminal)')
-            # spawn a subprocess to run and attach to same terminal
-            subprocess.run([sys.executable, interp, self.filename])
+            Interpreter(pane).run_program(self._program)
             self.set_message('Run finished')
+        except KeyboardInterrupt:
+            self.set_message('Run interrupted')
         except Exception as e:
             self.set_message(f'Run error: {e}')
+        finally:
+            if not headless:
+                curses.raw()
+            del pane
+            self.invalidate()
+
+    def invalidate(self):
+        """Forgets what is on screen so the next draw repaints everything."""
+        self._rows.clear()
+        self.stdscr.clear()
 
     def draw(self):
-        self.stdscr.erase()
         rows, cols = self.stdscr.getmaxyx()
+        if (rows, cols) != self._screen_size:
+            self._screen_size = (rows, cols)
+            self.invalidate()
 
         # top status
         status = f"{self.filename} - {'modified' if self.modified else 'saved'}  Ln {self.cursor_y+1}, Col {self.cursor_x+1}"
+        if not self.lines.complete:
+            status += f"  (loading... {len(self.lines)} lines)"
         if len(status) > cols - 1:
             status = status[:cols-1]
         try:
+            self.stdscr.move(0, 0)
+            self.stdscr.clrtoeol()
             self.stdscr.addstr(0, 0, status, curses.A_REVERSE)
         except curses.error:
             pass
@@ -112,55 +244,80 @@ class Editor:
         elif self.cursor_y >= self.view_y + height:
             self.view_y = self.cursor_y - height + 1
 
-        # draw lines with line numbers
-        gutter_w = 6
+        # draw lines with line numbers, skipping rows that have not changed
         for i in range(height):
             ln_no = self.view_y + i
             y = top + i
-            if ln_no >= len(self.lines):
+            line = self.lines[ln_no] if ln_no < len(self.lines) else None
+            key = (ln_no, line, self.search.generation)
+            if self._rows.get(y) == key:
+                continue
+            self._rows[y] = key
+            try:
+                self.stdscr.move(y, 0)
+                self.stdscr.clrtoeol()
+            except curses.error:
+                pass
+            if line is None:
                 continue
-            line = self.lines[ln_no]
             # draw gutter
             gutter = f"{ln_no+1:>4} "
             try:
-                self.stdscr.addstr(y, 0, gutter, curses.color_pair(0))
+                self.stdscr.addstr(y, 0, gutter, color_pair(0))
             except curses.error:
                 pass
 
             # draw line with simple highlighting
-            self._draw_line(y, gutter_w, cols - gutter_w, line)
+            self._draw_line(y, GUTTER_W, cols - GUTTER_W, line)
 
         # bottom message bar
-        msg = self.message or "Ctrl-S Save  Ctrl-R Run  Ctrl-Q Quit"
+        msg = self.message or HELP
         try:
+            self.stdscr.move(rows-1, 0)
+            self.stdscr.clrtoeol()
             self.stdscr.addstr(rows-1, 0, msg[:cols-1], curses.A_REVERSE)
         except curses.error:
             pass
 
         # set cursor
         curs_y = 1 + (self.cursor_y - self.view_y)
-        curs_x = self.cursor_x - self.view_x + gutter_w
+        curs_x = self.cursor_x - self.view_x + GUTTER_W
         try:
-            self.stdscr.move(curs_y, max(gutter_w, curs_x))
+            self.stdscr.move(curs_y, max(GUTTER_W, curs_x))
         except curses.error:
             # ignore move errors when off-screen
             pass
 
         self.stdscr.refresh()
 
-    def _draw_line(self, y: int, x: int, maxw: int, line: str):
+    def _highlight(self, line: str) -> Tuple:
+        """Returns the line as (text, attr) runs, cached by line content."""
+        runs = self._tokens.get(line)
+        if runs is not None:
+            self._tokens.move_to_end(line)
+            return runs
+        runs = self._tokenize(line)
+        self._tokens[line] = runs
+        if len(self._tokens) > TOKEN_CACHE_SIZE:
+            self._tokens.popitem(last=False)
+        return runs
+
+    def _tokenize(self, line: str) -> Tuple:
         # naive tokenization: detect REM (comment) and strings, then keywords
-        col = x
         if line.strip().upper().startswith('REM'):
-            try:
-                self.stdscr.addstr(y, col, line[:maxw], curses.color_pair(4))
-            except curses.error:
-                pass
-            return
+            return ((line, color_pair(4)),)
+
+        runs = []
+
+        def emit(text, attr):
+            # coalesce with the previous run when the attribute matches
+            if runs and runs[-1][1] == attr:
+                runs[-1] = (runs[-1][0] + text, attr)
+            else:
+                runs.append((text, attr))
 
         i = 0
-        in_str = False
-        while i < len(line) and col < x + maxw:
+        while i < len(line):
             ch = line[i]
             if ch == '"':
                 # string region
@@ -168,12 +325,7 @@ class Editor:
                 while j < len(line) and line[j] != '"':
                     j += 1
                 j = min(j, len(line)-1)
-                segment = line[i:j+1]
-                try:
-                    self.stdscr.addstr(y, col, segment[:x+maxw-col], curses.color_pair(2))
-                except curses.error:
-                    pass
-                col += len(segment)
+                emit(line[i:j+1], color_pair(2))
                 i = j+1
                 continue
 
@@ -184,73 +336,235 @@ class Editor:
                     j += 1
                 word = line[i:j]
                 if word.upper() in KEYWORDS:
-                    try:
-                        self.stdscr.addstr(y, col, word, curses.color_pair(1) | curses.A_BOLD)
-                    except curses.error:
-                        pass
+                    emit(word, color_pair(1) | curses.A_BOLD)
                 else:
-                    try:
-                        self.stdscr.addstr(y, col, word)
-                    except curses.error:
-                        pass
-                col += len(word)
+                    emit(word, curses.A_NORMAL)
                 i = j
                 continue
 
             # default
+            emit(ch, curses.A_NORMAL)
+            i += 1
+        return tuple(runs)
+
+    def _draw_line(self, y: int, x: int, maxw: int, line: str):
+        # one addstr per run of equally highlighted text
+        runs = self._highlight(line)
+        if self.search.active:
+            spans = self.search.spans(line)
+            if spans:
+                runs = _mark(runs, spans, curses.A_REVERSE)
+        col = x
+        for text, attr in runs:
+            if col >= x + maxw:
+                break
             try:
-                self.stdscr.addstr(y, col, ch)
+                self.stdscr.addstr(y, col, text[:x+maxw-col], attr)
             except curses.error:
                 pass
-            col += 1
-            i += 1
+            col += len(text)
+
+    def _apply(self, edits, cursor) -> List[List[str]]:
+        # every change to the buffer goes through here: (row, count,
+        # new_lines) replacements sorted by row, in pre-change coordinates
+        if len(edits) == 1:
+            row, count, new_lines = edits[0]
+            removed = [self.lines.replace(row, count, new_lines)]
+            self.search.on_replace(row, count, new_lines)
+        else:
+            removed = self.lines.replace_rows(edits)
+            self.search.on_replace_rows(edits)
+        if self.autosave is not None:
+            self.autosave.log(edits)
+        self.cursor_y = min(cursor[0], len(self.lines)-1)
+        self.cursor_x = min(cursor[1], len(self.lines[self.cursor_y]))
+        return removed
+
+    def _edit(self, edits, cursor, kind=None):
+        """Applies a user edit, moves the cursor and records it for undo."""
+        if not edits:
+            return
+        before = (self.cursor_y, self.cursor_x)
+        removed = self._apply(edits, cursor)
+        self.history.record(
+            [(row, tuple(old), tuple(new)) for (row, _, new), old in zip(edits, removed)],
+            before, (self.cursor_y, self.cursor_x), kind)
+        self._update_modified()
+
+    def _update_modified(self):
+        self.modified = self.history.state() is not self._saved_state
+
+    def undo(self):
+        entry = self.history.undo()
+        if entry is None:
+            self.set_message('Nothing to undo')
+            return
+        self._apply(entry.backward(), entry.cursor_before)
+        self._update_modified()
+
+    def redo(self):
+        entry = self.history.redo()
+        if entry is None:
+            self.set_message('Nothing to redo')
+            return
+        self._apply(entry.forward(), entry.cursor_after)
+        self._update_modified()
+
+    def prompt(self, label: str, text: str = '', on_change=None, on_key=None):
+        """Reads a line of input in the message bar.
+
+        Returns the text, or None when cancelled with Esc. `on_change` is
+        called with the text after every edit, `on_key` with any other key.
+        """
+        while True:
+            self.set_message(label + text)
+            self.draw()
+            rows, cols = self.stdscr.getmaxyx()
+            try:
+                self.stdscr.move(rows-1, min(cols-1, len(label) + len(text)))
+            except curses.error:
+                pass
+            self.stdscr.refresh()
+            key = self.stdscr.getch()
+            if key in (10, 13):
+                self.set_message('')
+                return text
+            if key == ESC:
+                self.set_message('')
+                return None
+            if key in (curses.KEY_BACKSPACE, 127, 8):
+                if not text:
+                    continue
+                text = text[:-1]
+            elif 0 <= key <= 255 and chr(key).isprintable():
+                text += chr(key)
+            else:
+                if on_key and key != -1:
+                    on_key(key)
+                continue
+            if on_change:
+                on_change(text)
+
+    def _goto(self, pos):
+        if pos is not None:
+            self.cursor_y, self.cursor_x = pos
+
+    def find(self):
+        """Incremental search: matches are highlighted as the pattern is typed."""
+        self.lines.sync(wait=True)
+        origin = (self.cursor_y, self.cursor_x)
+
+        def on_change(text):
+            self.search.set_pattern(self.lines, text)
+            self.cursor_y, self.cursor_x = origin
+            self._goto(self.search.next_match(self.lines, origin[0], origin[1] - 1))
+
+        def on_key(key):
+            if key in (curses.KEY_DOWN, CTRL_F, CTRL_N):
+                self.find_next()
+            elif key in (curses.KEY_UP, CTRL_P):
+                self.find_next(backward=True)
+
+        initial = '' if self.search.regex else self.search.pattern
+        text = self.prompt('Find: ', initial, on_change, on_key)
+        if text is None:
+            self.search.clear()
+            self.cursor_y, self.cursor_x = origin
+        elif self.search.active:
+            self.set_message(f"{len(self.search.rows)} matching lines - Ctrl-N next, Ctrl-P previous")
+
+    def find_next(self, backward: bool = False):
+        if not self.search.active:
+            self.set_message('Nothing to find - press Ctrl-F')
+            return
+        pos = self.search.next_match(self.lines, self.cursor_y, self.cursor_x, backward)
+        if pos is None:
+            self.set_message(f"'{self.search.pattern}' not found")
+        self._goto(pos)
+
+    def replace_all(self):
+        """Replaces every match of a regular expression in the buffer.
+
+        The prompt starts with the active search; if it is kept, only the
+        lines the search index already found are touched.
+        """
+        search = self.search
+        active = ''
+        if search.active:
+            active = search.pattern if search.regex else re.escape(search.pattern)
+        pattern = self.prompt('Replace (regex): ', active)
+        if not pattern:
+            return
+        repl = self.prompt(f'Replace /{pattern}/ with: ')
+        if repl is None:
+            return
+        self.lines.sync(wait=True)
+        try:
+            regex = re.compile(pattern)
+            if pattern == active:
+                rows = self._rows_of(search.rows)
+            else:
+                find = regex.search
+                rows = [(row, line) for row, line in enumerate(self.lines) if find(line)]
+            edits = []
+            for row, line in rows:
+                new = regex.sub(repl, line)
+                if new != line:
+                    edits.append((row, 1, new.split('\n')))
+        except re.error as e:
+            self.set_message(f'Bad pattern: {e}')
+            return
+
+        self._edit(edits, (self.cursor_y, self.cursor_x))
+        self.set_message(f'Replaced matches on {len(edits)} lines')
+
+    def _rows_of(self, rows):
+        """Yields (row, line) for sorted rows, reading each run in one walk."""
+        i = 0
+        while i < len(rows):
+            j = i + 1
+            while j < len(rows) and rows[j] == rows[j - 1] + 1:
+                j += 1
+            yield from zip(rows[i:j], self.lines.iter_lines(rows[i], rows[j - 1] + 1))
+            i = j
 
     def insert_char(self, ch: str):
-        line = self.lines[self.cursor_y]
-        self.lines[self.cursor_y] = line[:self.cursor_x] + ch + line[self.cursor_x:]
-        self.cursor_x += len(ch)
-        self.modified = True
+        y, x = self.cursor_y, self.cursor_x
+        line = self.lines[y]
+        self._edit([(y, 1, [line[:x] + ch + line[x:]])], (y, x + len(ch)), 'insert')
 
     def newline(self):
-        line = self.lines[self.cursor_y]
-        left = line[:self.cursor_x]
-        right = line[self.cursor_x:]
-        self.lines[self.cursor_y] = left
-        self.lines.insert(self.cursor_y+1, right)
-        self.cursor_y += 1
-        self.cursor_x = 0
-        self.modified = True
+        y, x = self.cursor_y, self.cursor_x
+        line = self.lines[y]
+        left = line[:x]
+        right = line[x:]
+        self._edit([(y, 1, [left, right])], (y + 1, 0))
 
     def backspace(self):
-        if self.cursor_x > 0:
-            line = self.lines[self.cursor_y]
-            self.lines[self.cursor_y] = line[:self.cursor_x-1] + line[self.cursor_x:]
-            self.cursor_x -= 1
-            self.modified = True
-        elif self.cursor_y > 0:
-            prev = self.lines[self.cursor_y-1]
-            cur = self.lines[self.cursor_y]
-            self.cursor_x = len(prev)
-            self.lines[self.cursor_y-1] = prev + cur
-            del self.lines[self.cursor_y]
-            self.cursor_y -= 1
-            self.modified = True
+        y, x = self.cursor_y, self.cursor_x
+        if x > 0:
+            line = self.lines[y]
+            self._edit([(y, 1, [line[:x-1] + line[x:]])], (y, x - 1), 'delete')
+        elif y > 0:
+            prev = self.lines[y-1]
+            cur = self.lines[y]
+            self._edit([(y-1, 2, [prev + cur])], (y - 1, len(prev)))
 
     def delete_char(self):
-        line = self.lines[self.cursor_y]
-        if self.cursor_x < len(line):
-            self.lines[self.cursor_y] = line[:self.cursor_x] + line[self.cursor_x+1:]
-            self.modified = True
-        elif self.cursor_y < len(self.lines)-1:
+        y, x = self.cursor_y, self.cursor_x
+        line = self.lines[y]
+        if x < len(line):
+            self._edit([(y, 1, [line[:x] + line[x+1:]])], (y, x), 'forward_delete')
+        elif y < len(self.lines)-1:
             # join next line
-            self.lines[self.cursor_y] = line + self.lines[self.cursor_y+1]
-            del self.lines[self.cursor_y+1]
-            self.modified = True
+            self._edit([(y, 2, [line + self.lines[y+1]])], (y, x))
 
     def handle_key(self, key):
         if key == CTRL_S:
             self.save_file()
         elif key == CTRL_Q:
+            # a Ctrl-S just before is only queued; let it land first
+            self._poll_autosave(wait=True)
             if self.modified:
                 self.set_message('Unsaved changes - press Ctrl-Q again to quit without saving')
                 self.modified = self.modified  # no-op, message only
@@ -259,6 +573,18 @@ class Editor:
             return 'quit'
         elif key == CTRL_R:
             self.run_file()
+        elif key == CTRL_F:
+            self.find()
+        elif key == CTRL_N:
+            self.find_next()
+        elif key == CTRL_P:
+            self.find_next(backward=True)
+        elif key == CTRL_T:
+            self.replace_all()
+        elif key == CTRL_Z:
+            self.undo()
+        elif key == CTRL_Y:
+            self.redo()
         elif key in (curses.KEY_LEFT,):
             if self.cursor_x > 0:
                 self.cursor_x -= 1
@@ -303,13 +629,39 @@ class Editor:
                 self.insert_char(ch)
 
     def run(self):
-        confirm_quit = False
+        self.autosave = autosave.Autosaver(self.filename, self._offer_recovery())
+        try:
+            self._loop()
+        except BaseException:
+            # flush the journal but keep it, so the edits can be recovered
+            self.autosave.close(keep_recovery=True)
+            raise
+        else:
+            # waits for pending saves; a clean exit needs no recovery files
+            self.autosave.close()
+        finally:
+            self.lines.close()
+
+    def _loop(self):
         while True:
+            # keep polling while the file is still being indexed or saved,
+            # and wake up now and then to checkpoint unsaved edits
+            loading = not self.lines.complete
+            self.lines.sync()
+            self._poll_autosave()
+            self.autosave.tick(self.lines)
+            if loading or self._saves_pending:
+                self.stdscr.timeout(100)
+            else:
+                self.stdscr.timeout(1000 if self.modified else -1)
             self.draw()
             key = self.stdscr.getch()
+            if key == -1:
+                continue
             res = self.handle_key(key)
             if res == 'confirm_quit':
                 # wait for another Ctrl-Q
+                self.stdscr.timeout(-1)
                 k2 = self.stdscr.getch()
                 if k2 == CTRL_Q:
                     return
@@ -319,7 +671,7 @@ class Editor:
                 return
 
 
-def sedit():
+def sedit(filename=DEFAULT_FILENAME):
     # on Windows, curses isn't included; the user should install windows-curses
     try:
         import curses  # noqa: F401
@@ -327,11 +679,11 @@ def sedit():
         print('curses not available. On Windows run: pip install windows-curses')
         sys.exit(1)
 
-    filename = sys.argv[1] if len(sys.argv) > 1 else 'sbesic'
-
     def wrapped(stdscr):
         # configure
         curses.raw()
+        if hasattr(curses, 'set_escdelay'):
+            curses.set_escdelay(25)  # Esc cancels prompts without a long pause
         stdscr.keypad(True)
         curses.curs_set(1)
         ed = Editor(stdscr, filename)
@@ -341,4 +693,4 @@ def sedit():
 
 
 if __name__ == '__main__':
-    sedit()
+    sedit(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_FILENAME)
@@ -0,0 +1,44 @@
+"""Checks of SEDIT's atomic saves."""
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+
+from autosave import atomic_write
+
+
+class AtomicWriteTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        self.path = os.path.join(self.folder, 'PROG.TXT')
+
+    def mode(self, path):
+        return stat.S_IMODE(os.stat(path).st_mode)
+
+    def test_new_file_follows_umask(self):
+        umask = os.umask(0o022)
+        os.umask(umask)
+        atomic_write(self.path, ['10 PRINT 1'])
+        self.assertEqual(self.mode(self.path), 0o666 & ~umask)
+
+    def test_existing_mode_kept(self):
+        atomic_write(self.path, ['a'])
+        os.chmod(self.path, 0o640)
+        atomic_write(self.path, ['b'])
+        self.assertEqual(self.mode(self.path), 0o640)
+
+    @unittest.skipUnless(hasattr(os, 'symlink') and os.name != 'nt', 'needs symlinks')
+    def test_symlink_kept(self):
+        atomic_write(self.path, ['a'])
+        link = os.path.join(self.folder, 'LINK.TXT')
+        os.symlink(self.path, link)
+        atomic_write(link, ['b'])
+        self.assertTrue(os.path.islink(link))
+        with open(self.path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), 'b\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
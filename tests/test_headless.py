@@ -0,0 +1,75 @@
+"""The curses front ends, played on a headless VirtualScreen."""
+import curses
+import os
+import tempfile
+import unittest
+
+import sedit
+from game_Pack import snake_game
+from SBASIC import Interpreter
+from vscreen import VirtualScreen
+
+
+class VirtualScreenTest(unittest.TestCase):
+    def test_flush_writes_only_changed_cells(self):
+        screen = VirtualScreen(None, 5, 10)
+        screen.addstr(1, 2, "hello")
+        screen.flush()
+        written = screen.cells_written
+        screen.addstr(1, 2, "help!")
+        screen.flush()
+        self.assertEqual(screen.cells_written - written, 2)
+        self.assertEqual(screen.lines()[1], "  help!   ")
+
+
+class InterpreterTest(unittest.TestCase):
+    def test_print_locate_cls_input(self):
+        screen = VirtualScreen(None, 10, 40, keys=[*b"Ada\n", ord(" ")])
+        Interpreter(screen).run("\n".join([
+            "PRINT gone",
+            "CLS",
+            "PRINT first",
+            "LOCATE 3 5",
+            "PRINT at three",
+            "INPUT name Name?",
+            "PRINT hi %name%",
+            "WAIT 2",
+        ]))
+        lines = screen.lines()
+        self.assertEqual(lines[0].rstrip(), "first")
+        self.assertEqual(lines[3].rstrip(), "     at three")
+        self.assertEqual(lines[4].rstrip(), "Name? Ada")
+        self.assertEqual(lines[5].rstrip(), "hi Ada")
+        self.assertNotIn("gone", "".join(lines))
+        self.assertEqual(screen.clock(), 2)
+
+
+class SnakeTest(unittest.TestCase):
+    def test_runs_into_top_wall(self):
+        screen = VirtualScreen(None, 20, 40, keys=[curses.KEY_UP])
+        self.assertEqual(snake_game(screen), 0)
+        lines = screen.lines()
+        self.assertTrue(lines[0].startswith("  Score: 0  Speed: 3"))
+        # the snake turned up from (10, 10) and died with its head on row 1
+        self.assertEqual([lines[y][10] for y in range(1, 4)], ["#", "#", "#"])
+        self.assertEqual(lines[4][10], " ")
+        self.assertIn("GAME OVER! Your Score: 0", lines[10])
+
+
+class EditorTest(unittest.TestCase):
+    def test_edit_and_save(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "prog.sb")
+            with open(path, "w") as f:
+                f.write("PRINT one\nPRINT two\n")
+            screen = VirtualScreen(None, 12, 60)
+            screen.feed(curses.KEY_DOWN, curses.KEY_END, "!", sedit.CTRL_S, sedit.CTRL_Q)
+            sedit.Editor(screen, path).run()
+            with open(path) as f:
+                self.assertEqual(f.read(), "PRINT one\nPRINT two!\n")
+            self.assertIn("PRINT two!", "".join(screen.lines()))
+            self.assertEqual(sorted(os.listdir(folder)), ["prog.sb"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+"""Checks of SDOS command line completion."""
+import unittest
+
+from lineedit import COMPLETION_LIMIT, DosCompleter, PrefixTrie
+
+
+class PrefixTrieTest(unittest.TestCase):
+    def test_complete_and_discard(self):
+        trie = PrefixTrie(["Dir", "DEL", "Cls", "cd"])
+        self.assertEqual(trie.complete("d"), ["DEL", "Dir"])
+        self.assertIn("CLS", trie)
+        trie.discard("del")
+        self.assertEqual(trie.complete("D"), ["Dir"])
+        self.assertEqual(len(trie), 3)
+
+
+class DosCompleterTest(unittest.TestCase):
+    def setUp(self):
+        listing = [("F%d.TXT" % i, 10) for i in range(20000)]
+        listing += [("FOO", "<DIR>"), ("FA0.SDOS", 5)]
+        self.files = {"C:\\": listing, "C:\\FOO": []}
+        self.completer = DosCompleter(["CD", "CLS", "RUN"], self.files, lambda: "C:\\",
+                                      {"CD": "dirs", "RUN": ".SDOS"})
+
+    def test_commands(self):
+        self.assertEqual(self.completer.complete("C", "C"), ["CD ", "CLS "])
+        self.assertEqual(self.completer.complete("DIR F", "F"), [])
+
+    def test_many_files_do_not_hide_directories(self):
+        self.assertGreater(20000, COMPLETION_LIMIT)
+        self.assertEqual(self.completer.complete("CD F", "F"), ["FOO\\"])
+        self.assertEqual(self.completer.complete("CD C:\\F", "C:\\F"), ["C:\\FOO\\"])
+
+    def test_many_files_do_not_hide_programs(self):
+        self.assertEqual(self.completer.complete("RUN F", "F"), ["FA0.SDOS "])
+
+    def test_entries_kept_up_to_date(self):
+        self.completer.complete("CD F", "F")
+        self.completer.complete("RUN F", "F")
+        self.completer.add_entry("C:\\", "FUN", is_dir=True)
+        self.completer.add_entry("C:\\", "FB.SDOS")
+        self.completer.remove_entry("C:\\", "FA0.SDOS")
+        self.assertEqual(self.completer.complete("CD F", "F"), ["FOO\\", "FUN\\"])
+        self.assertEqual(self.completer.complete("RUN F", "F"), ["FB.SDOS "])
+
+    def test_resolve(self):
+        self.assertEqual(self.completer.resolve("foo"), "C:\\FOO")
+        self.assertEqual(self.completer.resolve("FOO\\.."), "C:\\")
+        self.assertIsNone(self.completer.resolve("BAR"))
+
+
+if __name__ == "__main__":
+    unittest.main()
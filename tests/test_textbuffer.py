@@ -0,0 +1,104 @@
+"""Randomized checks of the SEDIT piece table against a plain list."""
+import os
+import random
+import tempfile
+import unittest
+
+import textbuffer
+from textbuffer import MappedLines, TextBuffer
+
+
+def depth(node):
+    """Height of a treap, without recursing."""
+    best = 0
+    stack = [(node, 1)]
+    while stack:
+        node, d = stack.pop()
+        if node is not None:
+            best = max(best, d)
+            stack.append((node.left, d + 1))
+            stack.append((node.right, d + 1))
+    return best
+
+
+class TextBufferTest(unittest.TestCase):
+    def check(self, buf, ref):
+        self.assertEqual(len(buf), len(ref))
+        self.assertEqual(list(buf), ref)
+        for i in random.sample(range(len(ref)), min(20, len(ref))):
+            self.assertEqual(buf[i], ref[i])
+            stop = min(len(ref), i + 7)
+            self.assertEqual(list(buf.iter_lines(i, stop)), ref[i:stop])
+
+    def test_matches_list(self):
+        random.seed(1)
+        ref = [f"orig {i}" for i in range(500)]
+        buf = TextBuffer(list(ref))
+        snapshots = []
+        for step in range(2000):
+            op = random.random()
+            start = random.randrange(len(ref) + 1)
+            count = random.randrange(min(5, len(ref) - start) + 1)
+            new = [f"new {step}.{k}" for k in range(random.randrange(4))]
+            if op < 0.8:
+                removed = buf.replace(start, count, new)
+                self.assertEqual(removed, ref[start:start + count])
+                ref[start:start + count] = new
+            else:
+                # a few sorted, non-overlapping edits in one pass
+                rows = sorted(random.sample(range(len(ref)), min(3, len(ref))))
+                edits = [(r, 1, [f"bulk {step}.{r}"]) for r in rows]
+                removed = buf.replace_rows(edits)
+                self.assertEqual(removed, [[ref[r]] for r in rows])
+                for r in reversed(rows):
+                    ref[r:r + 1] = [f"bulk {step}.{r}"]
+            if not ref:
+                buf.insert(0, [""])
+                ref.append("")
+            if step % 100 == 0:
+                self.check(buf, ref)
+                snapshots.append((buf.snapshot(), list(ref)))
+        self.check(buf, ref)
+        for snap, lines in snapshots:
+            self.assertEqual(list(snap), lines)
+
+    def test_scattered_edits_stay_balanced(self):
+        # Cutting a big original piece must not chain its fragments into a
+        # spine, whatever priority the piece happened to get.
+        random.seed(2)
+        n = 200_000
+        ref = [str(i) for i in range(n)]
+        real_random = textbuffer.random.random
+        textbuffer.random.random = lambda: 0.999
+        try:
+            buf = TextBuffer(ref)
+        finally:
+            textbuffer.random.random = real_random
+        for step in range(2000):
+            row = random.randrange(n)
+            buf.replace(row, 1, [f"edit {step}"])
+            ref[row] = f"edit {step}"
+        self.assertLess(depth(buf._root), 100)
+        self.assertEqual(list(buf), ref)
+
+    def test_mapped_lines(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "crlf.txt")
+            with open(path, "wb") as f:
+                f.write(b"one\r\ntwo\n\r\nfour\r")
+            source = MappedLines(path)
+            try:
+                source.wait()
+                ref = ["one", "two", "", "four"]
+                self.assertEqual([source[i] for i in range(len(source))], ref)
+                self.assertEqual(source.lines(1, 4), ref[1:])
+                self.assertEqual(source.lines(2, 2), [])
+                buf = TextBuffer(source)
+                buf.replace_rows([(1, 1, ["2"]), (3, 1, ["4", "5"])])
+                self.assertEqual(list(buf), ["one", "2", "", "4", "5"])
+            finally:
+                source.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
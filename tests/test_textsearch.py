@@ -0,0 +1,34 @@
+"""Checks that SEDIT's match index follows edits like a full rescan."""
+import random
+import unittest
+
+from textbuffer import TextBuffer
+from textsearch import SearchIndex
+
+
+class SearchIndexTest(unittest.TestCase):
+    def test_bulk_edits_match_rescan(self):
+        random.seed(3)
+        buf = TextBuffer([random.choice(["PRINT 1", "GOTO 10", "REM x"]) for _ in range(300)])
+        index = SearchIndex()
+        index.set_pattern(buf, "PRINT")
+        for step in range(300):
+            rows = sorted(random.sample(range(len(buf)), random.randrange(1, 8)))
+            edits = [(row, random.randrange(2) if row < len(buf) - 1 else 1,
+                      [random.choice(["PRINT 2", "END"]) for _ in range(random.randrange(3))])
+                     for row in rows]
+            # drop edits overlapping the one before
+            edits = [e for i, e in enumerate(edits)
+                     if i == 0 or e[0] >= edits[i - 1][0] + edits[i - 1][1]]
+            buf.replace_rows(edits)
+            if not len(buf):
+                buf.insert(0, [""])
+                index.on_replace(0, 0, [""])
+            else:
+                index.on_replace_rows(edits)
+            expected = [i for i, line in enumerate(buf) if "PRINT" in line]
+            self.assertEqual(index.rows, expected, f"step {step}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,495 @@
+"""
+Line-oriented piece table used by SEDIT.
+
+The document is a sequence of pieces, each a run of lines taken either from
+the original file (a range of line numbers) or from text added while
+editing. Pieces live in a treap ordered by position and annotated with
+subtree line counts, so looking up line n, inserting and deleting lines are
+all O(log pieces) instead of shifting a Python list.
+
+Nodes are never modified once built: an edit copies only the nodes on its
+path. Taking a snapshot of the buffer is therefore as cheap as keeping a
+reference to the root.
+
+MappedLines serves the original lines of a file straight from a memory
+map, indexing line starts in a background thread, so opening a huge file
+does not wait for (or hold) its decoded contents.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import random
+import threading
+from array import array
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+MAX_PIECE_LINES = 64  # added pieces are merged with neighbours up to this size
+INDEX_CHUNK = 1 << 20  # bytes scanned per step by the line indexer
+READ_LINES = 4096  # original lines decoded at once when iterating
+
+
+class MappedLines:
+    """Read-only lines of a file, decoded on demand from a memory map.
+
+    Line starts are indexed in chunks by a daemon thread; ``len()`` grows
+    as complete lines are found and `done` is set once the whole file is
+    indexed. Only the first chunk is indexed before the constructor
+    returns, which is enough for the first screen.
+    """
+    def __init__(self, path: str, encoding: str = 'utf-8'):
+        self.path = path
+        self.encoding = encoding
+        self._file = open(path, 'rb')
+        self._size = os.fstat(self._file.fileno()).st_size
+        # start offset of every line, plus the start of the next one
+        self._starts = array('q', [0])
+        self._count = 0
+        self.done = False
+        self._lines: Optional[List[str]] = None  # set by release()
+        self._closed = False
+        if self._size == 0:
+            # an empty file still has one (empty) line
+            self._map = b''
+            self._starts.append(1)
+            self._count = 1
+            self.done = True
+            self._thread = None
+            return
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._pos = 0
+        self._index_chunk()
+        self._thread = threading.Thread(target=self._index_rest, daemon=True)
+        self._thread.start()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int) -> str:
+        mm = self._map  # read once: release() may drop it meanwhile
+        if mm is None:
+            return self._lines[i]
+        start, end = self._starts[i], self._starts[i + 1] - 1
+        if end > start and mm[end - 1] == 13:  # drop the CR of CRLF
+            end -= 1
+        return mm[start:end].decode(self.encoding, 'replace')
+
+    def lines(self, start: int, stop: int) -> List[str]:
+        """Returns lines [start, stop), decoded in one go."""
+        mm = self._map
+        if mm is None:
+            return self._lines[start:stop]
+        if start >= stop:
+            return []
+        text = mm[self._starts[start]:self._starts[stop] - 1].decode(self.encoding, 'replace')
+        lines = text.split('\n')
+        if '\r' in text:
+            lines = [line[:-1] if line.endswith('\r') else line for line in lines]
+        return lines
+
+    def wait(self):
+        """Blocks until the whole file is indexed."""
+        if self._thread is not None:
+            self._thread.join()
+
+    def release(self):
+        """Reads every line into memory and lets go of the file.
+
+        Windows cannot replace or delete a file that is still mapped, so
+        this must happen before the file is saved over there. Readers in
+        other threads keep working: a slice already in progress holds its
+        own reference to the map.
+        """
+        if self._map is None:
+            return
+        self.wait()
+        self._lines = [self[i] for i in range(self._count)]
+        self._map = None
+        self._file.close()
+
+    def close(self):
+        """Stops the indexer and unmaps the file."""
+        self._closed = True
+        if self._thread is not None:
+            self._thread.join()
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def _index_chunk(self):
+        mm, pos = self._map, self._pos
+        stop = min(self._size, pos + INDEX_CHUNK)
+        starts = array('q')
+        nl = mm.find(b'\n', pos, stop)
+        while nl != -1:
+            starts.append(nl + 1)
+            nl = mm.find(b'\n', nl + 1, stop)
+        self._starts.extend(starts)
+        self._pos = stop
+        if stop == self._size and self._starts[-1] < self._size:
+            # last line has no newline; pretend it has one past the end
+            self._starts.append(self._size + 1)
+        # publish only after the offsets are in place
+        self._count = len(self._starts) - 1
+        if stop == self._size:
+            self.done = True
+
+    def _index_rest(self):
+        while not self.done and not self._closed:
+            self._index_chunk()
+
+
+def _read(source, start: int, stop: int) -> List[str]:
+    """Lines [start, stop) of a piece table's original lines."""
+    if isinstance(source, MappedLines):
+        return source.lines(start, stop)
+    if isinstance(source, list):
+        return source[start:stop]
+    return [source[i] for i in range(start, stop)]
+
+
+class _Node:
+    __slots__ = ('added', 'first', 'count', 'prio', 'left', 'right', 'total')
+
+    def __init__(self, added, first, count, prio, left, right):
+        self.added = added    # tuple of lines, or None for an original piece
+        self.first = first    # first original line (original pieces only)
+        self.count = count    # lines in this piece
+        self.prio = prio
+        self.left = left
+        self.right = right
+        self.total = count + _total(left) + _total(right)
+
+
+def _total(node: Optional[_Node]) -> int:
+    return node.total if node is not None else 0
+
+
+def _with(node: _Node, left, right) -> _Node:
+    return _Node(node.added, node.first, node.count, node.prio, left, right)
+
+
+def _piece(node: _Node, start: int, stop: int, prio, left, right) -> _Node:
+    """Builds a node holding lines [start, stop) of `node`'s piece."""
+    if node.added is None:
+        return _Node(None, node.first + start, stop - start, prio, left, right)
+    return _Node(node.added[start:stop], 0, stop - start, prio, left, right)
+
+
+def _split(node: Optional[_Node], k: int):
+    """Splits a tree into its first `k` lines and the rest."""
+    if node is None:
+        return None, None
+    lt = _total(node.left)
+    if k <= lt:
+        a, b = _split(node.left, k)
+        return a, _with(node, b, node.right)
+    if k >= lt + node.count:
+        a, b = _split(node.right, k - lt - node.count)
+        return _with(node, node.left, a), b
+    # k falls inside this piece: cut it in two. The head keeps the node's
+    # place; the tail gets a fresh priority, or all fragments of one big
+    # piece would share a priority and merge into a linear spine.
+    off = k - lt
+    head = _piece(node, 0, off, node.prio, node.left, None)
+    tail = _merge(_piece(node, off, node.count, random.random(), None, None), node.right)
+    return head, tail
+
+
+def _merge(a: Optional[_Node], b: Optional[_Node]) -> Optional[_Node]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a.prio >= b.prio:
+        return _with(a, a.left, _merge(a.right, b))
+    return _with(b, _merge(a, b.left), b.right)
+
+
+def _added(lines: Sequence[str]) -> Optional[_Node]:
+    """Builds a tree of added pieces holding `lines`."""
+    tree = None
+    for i in range(0, len(lines), MAX_PIECE_LINES):
+        chunk = tuple(lines[i:i + MAX_PIECE_LINES])
+        tree = _merge(tree, _Node(chunk, 0, len(chunk), random.random(), None, None))
+    return tree
+
+
+def _build(pieces: List[tuple]) -> Optional[_Node]:
+    """Builds a balanced tree from (added, first, count) pieces in O(n).
+
+    Priorities are random values handed out in breadth-first order, largest
+    first, so every parent outranks its children.
+    """
+    if not pieces:
+        return None
+    prios = sorted((random.random() for _ in pieces), reverse=True)
+    rank = {}
+    queue = [(0, len(pieces))]
+    for lo, hi in queue:
+        mid = (lo + hi) // 2
+        rank[mid] = prios[len(rank)]
+        if lo < mid:
+            queue.append((lo, mid))
+        if mid + 1 < hi:
+            queue.append((mid + 1, hi))
+
+    def build(lo, hi):
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        added, first, count = pieces[mid]
+        return _Node(added, first, count, rank[mid], build(lo, mid), build(mid + 1, hi))
+    return build(0, len(pieces))
+
+
+def _nodes(node: Optional[_Node]) -> Iterator[_Node]:
+    """Yields the nodes of a tree in document order."""
+    stack = []
+    while stack or node is not None:
+        while node is not None:
+            stack.append(node)
+            node = node.left
+        node = stack.pop()
+        yield node
+        node = node.right
+
+
+def _last(node: Optional[_Node]) -> Optional[_Node]:
+    while node is not None and node.right is not None:
+        node = node.right
+    return node
+
+
+class TextBuffer:
+    """A list of lines backed by a piece table.
+
+    Supports ``len()``, indexing, slicing and iteration like the plain
+    ``List[str]`` it replaces; all changes go through ``replace()``.
+    """
+    def __init__(self, source: Sequence[str] = ('',)):
+        self._source = source
+        self._root: Optional[_Node] = None
+        self._loaded = 0  # source lines added to the tree so far
+        self.sync()
+
+    @property
+    def complete(self) -> bool:
+        """False while the source is still being indexed."""
+        return getattr(self._source, 'done', True)
+
+    def sync(self, wait: bool = False):
+        """Appends source lines indexed since the last call.
+
+        Lines reach the source in file order and the user can only edit
+        lines already loaded, so new ones always belong at the end.
+        """
+        if wait and not self.complete:
+            self._source.wait()
+        n = len(self._source)
+        if n > self._loaded:
+            root, first = self._root, self._loaded
+            last = _last(root)
+            if last is not None and last.added is None and last.first + last.count == first:
+                # extend the trailing original piece instead of adding one
+                root, _ = _split(root, _total(root) - last.count)
+                first = last.first
+            piece = _Node(None, first, n - first, random.random(), None, None)
+            self._root = _merge(root, piece)
+            self._loaded = n
+
+    def __len__(self) -> int:
+        return _total(self._root)
+
+    def __iter__(self) -> Iterator[str]:
+        return self.iter_lines()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            lines = list(self.iter_lines(start, max(start, stop)))
+            return lines[::step] if step != 1 else lines
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError('line index out of range')
+        node = self._root
+        while True:
+            lt = _total(node.left)
+            if index < lt:
+                node = node.left
+            elif index < lt + node.count:
+                off = index - lt
+                if node.added is not None:
+                    return node.added[off]
+                return self._source[node.first + off]
+            else:
+                index -= lt + node.count
+                node = node.right
+
+    def iter_lines(self, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+        """Yields lines [start, stop) in O(log n + stop - start)."""
+        if stop is None or stop > len(self):
+            stop = len(self)
+        remaining = stop - start
+        if remaining <= 0:
+            return
+        # Walk down to `start`, remembering the ancestors still to visit.
+        stack = []
+        node = self._root
+        skip = start
+        while node is not None:
+            lt = _total(node.left)
+            if skip < lt:
+                stack.append((node, 0))
+                node = node.left
+            elif skip < lt + node.count:
+                stack.append((node, skip - lt))
+                break
+            else:
+                skip -= lt + node.count
+                node = node.right
+
+        source = self._source
+        while stack and remaining > 0:
+            node, off = stack.pop()
+            end = min(node.count, off + remaining)
+            if node.added is not None:
+                yield from node.added[off:end]
+            else:
+                for i in range(node.first + off, node.first + end, READ_LINES):
+                    yield from _read(source, i, min(i + READ_LINES, node.first + end))
+            remaining -= end - off
+            node = node.right
+            while node is not None:
+                stack.append((node, 0))
+                node = node.left
+
+    def replace(self, start: int, count: int, new_lines: Sequence[str]) -> List[str]:
+        """Replaces lines [start, start+count) with `new_lines`.
+
+        Returns the removed lines.
+        """
+        left, rest = _split(self._root, start)
+        removed, right = _split(rest, count)
+        old = list(TextBuffer._from_root(self._source, removed))
+
+        # Fold the new lines into a small added piece just before them, so
+        # typing across neighbouring lines does not fragment the tree.
+        last = _last(left)
+        if (new_lines and last is not None and last.added is not None
+                and last.count + len(new_lines) <= MAX_PIECE_LINES):
+            left, _ = _split(left, _total(left) - last.count)
+            new_lines = last.added + tuple(new_lines)
+
+        self._root = _merge(_merge(left, _added(new_lines)), right)
+        return old
+
+    def replace_rows(self, edits: Sequence[Tuple[int, int, Sequence[str]]]) -> List[List[str]]:
+        """Applies many replacements in one pass.
+
+        `edits` holds non-overlapping (row, count, new_lines) triples sorted
+        by row, all in the coordinates of the current buffer. Returns the
+        lines removed by each edit. The tree is rebuilt once, which beats
+        one replace() per edit for bulk changes.
+        """
+        pieces = []
+        removed = []
+        source = self._source
+
+        def add(added, first, count):
+            if count <= 0:
+                return
+            if added is not None and pieces and pieces[-1][0] is not None \
+                    and pieces[-1][2] + count <= MAX_PIECE_LINES:
+                prev = pieces.pop()
+                added = prev[0] + added
+                count += prev[2]
+            pieces.append((added, first, count))
+
+        def add_lines(lines):
+            if len(lines) <= MAX_PIECE_LINES:
+                add(tuple(lines), 0, len(lines))
+                return
+            for i in range(0, len(lines), MAX_PIECE_LINES):
+                chunk = tuple(lines[i:i + MAX_PIECE_LINES])
+                add(chunk, 0, len(chunk))
+
+        def add_part(node, start, stop):
+            if node.added is None:
+                add(None, node.first + start, stop - start)
+            else:
+                add(node.added[start:stop], 0, stop - start)
+
+        def lines_of(node, start, stop):
+            if node.added is None:
+                return _read(source, node.first + start, node.first + stop)
+            return list(node.added[start:stop])
+
+        todo = iter(edits)
+        edit = next(todo, None)
+        skip = 0  # lines the current edit still has to remove
+        pos = 0
+        for node in _nodes(self._root):
+            start = 0
+            if skip:
+                start = min(skip, node.count)
+                removed[-1].extend(lines_of(node, 0, start))
+                skip -= start
+            while not skip and edit is not None and edit[0] < pos + node.count:
+                row, count, new_lines = edit
+                off = row - pos
+                add_part(node, start, off)
+                add_lines(new_lines)
+                stop = min(node.count, off + count)
+                removed.append(lines_of(node, off, stop))
+                skip = off + count - stop
+                start = stop
+                edit = next(todo, None)
+            add_part(node, start, node.count)
+            pos += node.count
+        while edit is not None:
+            # insertions after the last line
+            add_lines(edit[2])
+            removed.append([])
+            edit = next(todo, None)
+        self._root = _build(pieces)
+        return removed
+
+    def insert(self, index: int, lines: Sequence[str]):
+        self.replace(index, 0, lines)
+
+    def delete(self, start: int, count: int = 1) -> List[str]:
+        return self.replace(start, count, ())
+
+    def text(self) -> str:
+        return '\n'.join(self.iter_lines())
+
+    def release_source(self):
+        """Copies the lines still read from the source into memory.
+
+        Snapshots share the source, so they are released too.
+        """
+        self.sync(wait=True)
+        release = getattr(self._source, 'release', None)
+        if release is not None:
+            release()
+
+    def close(self):
+        """Closes the source (e.g. a MappedLines) once nothing reads it."""
+        close = getattr(self._source, 'close', None)
+        if close is not None:
+            close()
+
+    def snapshot(self) -> 'TextBuffer':
+        """Returns an independent copy sharing all unchanged pieces."""
+        return TextBuffer._from_root(self._source, self._root, self._loaded)
+
+    @classmethod
+    def _from_root(cls, source, root, loaded=0) -> 'TextBuffer':
+        buf = cls.__new__(cls)
+        buf._source = source
+        buf._root = root
+        buf._loaded = loaded
+        return buf
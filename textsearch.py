@@ -0,0 +1,157 @@
+"""
+Match index for SEDIT's incremental search and replace-all.
+
+SearchIndex keeps the sorted numbers of the lines matching the current
+pattern. Edits report the lines they replaced through `on_replace()` (or
+`on_replace_rows()` for a bulk edit), so
+only those lines are searched again; typing more characters of a literal
+pattern only rechecks the lines that already matched.
+"""
+from __future__ import annotations
+
+import bisect
+import re
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+SPAN_CACHE_SIZE = 1024  # lines whose match positions are remembered
+
+
+class SearchIndex:
+    def __init__(self):
+        self.pattern = ''
+        self.regex = False
+        self.generation = 0  # bumped whenever the pattern changes
+        self.rows: List[int] = []
+        self._re: Optional[re.Pattern] = None
+        self._spans: 'OrderedDict[str, Tuple]' = OrderedDict()
+
+    @property
+    def active(self) -> bool:
+        return self._re is not None
+
+    def set_pattern(self, lines, pattern: str, regex: bool = False):
+        """Searches `lines` for a new pattern.
+
+        Raises re.error for an invalid regular expression.
+        """
+        compiled = re.compile(pattern if regex else re.escape(pattern)) if pattern else None
+        narrowing = (self._re is not None and not regex and not self.regex
+                     and pattern.startswith(self.pattern))
+        old_rows = self.rows
+
+        self.pattern = pattern
+        self.regex = regex
+        self.generation += 1
+        self._re = compiled
+        self._spans.clear()
+        if compiled is None:
+            self.rows = []
+        elif narrowing:
+            # a longer literal can only match where the shorter one did
+            search = compiled.search
+            self.rows = [i for i in old_rows if search(lines[i])]
+        else:
+            self.reindex(lines)
+
+    def reindex(self, lines):
+        """Rescans every line for the current pattern."""
+        self._spans.clear()
+        if self._re is None:
+            self.rows = []
+            return
+        search = self._re.search
+        self.rows = [i for i, line in enumerate(lines) if search(line)]
+
+    def clear(self):
+        self.pattern = ''
+        self.generation += 1
+        self._re = None
+        self.rows = []
+        self._spans.clear()
+
+    def on_replace(self, start: int, count: int, new_lines: Sequence[str]):
+        """Updates the index after lines [start, start+count) were replaced."""
+        if self._re is None:
+            return
+        rows = self.rows
+        lo = bisect.bisect_left(rows, start)
+        hi = bisect.bisect_left(rows, start + count)
+        search = self._re.search
+        found = [start + k for k, line in enumerate(new_lines) if search(line)]
+        delta = len(new_lines) - count
+        if delta:
+            rows[hi:] = [i + delta for i in rows[hi:]]
+        rows[lo:hi] = found
+
+    def on_replace_rows(self, edits: Sequence[Tuple[int, int, Sequence[str]]]):
+        """Updates the index after TextBuffer.replace_rows(edits).
+
+        Does what one on_replace() per edit, last edit first, would do, but
+        shifts the untouched rows in a single pass.
+        """
+        if self._re is None:
+            return
+        rows = self.rows
+        n = len(rows)
+        search = self._re.search
+        out = []
+        append = out.append
+        i = 0
+        delta = 0  # how far the rows seen so far have moved
+        for start, count, new_lines in edits:
+            while i < n and rows[i] < start:
+                append(rows[i] + delta)
+                i += 1
+            end = start + count
+            while i < n and rows[i] < end:
+                i += 1
+            first = start + delta
+            for k, line in enumerate(new_lines):
+                if search(line):
+                    append(first + k)
+            delta += len(new_lines) - count
+        out.extend([r + delta for r in rows[i:]] if delta else rows[i:])
+        self.rows = out
+
+    def spans(self, line: str) -> Tuple:
+        """Returns the (start, end) columns of the matches in a line."""
+        if self._re is None:
+            return ()
+        spans = self._spans.get(line)
+        if spans is None:
+            spans = tuple(m.span() for m in self._re.finditer(line) if m.end() > m.start())
+            self._spans[line] = spans
+            if len(self._spans) > SPAN_CACHE_SIZE:
+                self._spans.popitem(last=False)
+        else:
+            self._spans.move_to_end(line)
+        return spans
+
+    def next_match(self, lines, y: int, x: int, backward: bool = False):
+        """Returns the (line, col) of the match after (or before) y, x.
+
+        Wraps around the end of the buffer; None when nothing matches.
+        """
+        rows = self.rows
+        if not rows:
+            return None
+        if not backward:
+            for start, _ in self.spans(lines[y]) if self._has_row(y) else ():
+                if start > x:
+                    return y, start
+            i = bisect.bisect_right(rows, y)
+            row = rows[i % len(rows)]
+            spans = self.spans(lines[row])
+            return (row, spans[0][0]) if spans else (row, 0)
+        for start, _ in reversed(self.spans(lines[y]) if self._has_row(y) else ()):
+            if start < x:
+                return y, start
+        i = bisect.bisect_left(rows, y)
+        row = rows[i - 1]
+        spans = self.spans(lines[row])
+        return (row, spans[-1][0]) if spans else (row, 0)
+
+    def _has_row(self, y: int) -> bool:
+        i = bisect.bisect_left(self.rows, y)
+        return i < len(self.rows) and self.rows[i] == y
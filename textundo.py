@@ -0,0 +1,117 @@
+"""
+Undo/redo history for SEDIT.
+
+Each entry stores the edit itself rather than a copy of the buffer: the
+rows it touched with their old and new lines, plus the cursor before and
+after. Undoing or redoing costs O(size of the edit). Consecutive typing
+(or deleting) on one line is coalesced into a single entry, and the
+oldest entries are dropped once the history exceeds its memory limit.
+"""
+from __future__ import annotations
+
+from collections import deque
+from typing import List, Optional, Sequence, Tuple
+
+UNDO_MEMORY_LIMIT = 4 * 1024 * 1024  # approximate bytes kept for undo
+LINE_OVERHEAD = 56  # rough cost of one stored line beyond its characters
+
+# (row, old_lines, new_lines); rows are in the coordinates of the buffer
+# before the entry was applied, edits are sorted and non-overlapping
+Edit = Tuple[int, Tuple[str, ...], Tuple[str, ...]]
+
+
+def _size(lines: Sequence[str]) -> int:
+    return sum(map(len, lines)) + LINE_OVERHEAD * len(lines)
+
+
+class UndoEntry:
+    __slots__ = ('edits', 'cursor_before', 'cursor_after', 'kind', 'size')
+
+    def __init__(self, edits: List[Edit], cursor_before, cursor_after, kind=None):
+        self.edits = edits
+        self.cursor_before = cursor_before
+        self.cursor_after = cursor_after
+        self.kind = kind
+        self.size = sum(_size(old) + _size(new) for _, old, new in edits)
+
+    def forward(self) -> List[Tuple[int, int, Tuple[str, ...]]]:
+        """The edits as (row, count, new_lines) replacements."""
+        return [(row, len(old), new) for row, old, new in self.edits]
+
+    def backward(self) -> List[Tuple[int, int, Tuple[str, ...]]]:
+        """Replacements that restore the buffer from after the entry."""
+        out = []
+        shift = 0
+        for row, old, new in self.edits:
+            out.append((row + shift, len(new), old))
+            shift += len(new) - len(old)
+        return out
+
+
+class UndoLog:
+    def __init__(self, limit: int = UNDO_MEMORY_LIMIT):
+        self.limit = limit
+        self._undo: deque = deque()
+        self._redo: List[UndoEntry] = []
+        self._size = 0
+        self._sealed = False
+        # what state() reports once everything is undone; replaced by a new
+        # marker when old entries are evicted, since the start of the
+        # history then no longer is the state the buffer began in
+        self._bottom = None
+
+    def record(self, edits: List[Edit], cursor_before, cursor_after, kind: Optional[str] = None):
+        """Adds an edit to the history and forgets anything undone.
+
+        Entries of the same `kind` ('insert', 'delete') continue one another
+        when they touch a single row and start where the previous one left
+        the cursor; those are merged instead of stacked.
+        """
+        self._redo.clear()
+        last = self._undo[-1] if self._undo else None
+        if (kind is not None and last is not None and not self._sealed
+                and last.kind == kind and len(last.edits) == 1 and len(edits) == 1
+                and last.cursor_after == cursor_before):
+            row, old, mid = last.edits[0]
+            new_row, new_old, new = edits[0]
+            if new_row == row and new_old == mid:
+                self._size -= last.size
+                merged = UndoEntry([(row, old, new)], last.cursor_before, cursor_after, kind)
+                self._undo[-1] = merged
+                self._size += merged.size
+                return
+
+        entry = UndoEntry(edits, cursor_before, cursor_after, kind)
+        self._undo.append(entry)
+        self._size += entry.size
+        self._sealed = False
+        # evict oldest first, but always keep the newest entry
+        while self._size > self.limit and len(self._undo) > 1:
+            self._size -= self._undo.popleft().size
+            self._bottom = object()
+
+    def seal(self):
+        """Stops the next edit from merging into the current last entry."""
+        self._sealed = True
+
+    def undo(self) -> Optional[UndoEntry]:
+        if not self._undo:
+            return None
+        entry = self._undo.pop()
+        self._size -= entry.size
+        self._redo.append(entry)
+        self._sealed = True
+        return entry
+
+    def redo(self) -> Optional[UndoEntry]:
+        if not self._redo:
+            return None
+        entry = self._redo.pop()
+        self._undo.append(entry)
+        self._size += entry.size
+        self._sealed = True
+        return entry
+
+    def state(self) -> Optional[UndoEntry]:
+        """Identifies the current point in history (e.g. to track saves)."""
+        return self._undo[-1] if self._undo else self._bottom
@@ -0,0 +1,295 @@
+"""
+name: "vscreen"
+description: "Double-buffered virtual screen shared by the SDOS curses front ends"
+author: "martinP"
+
+VirtualScreen looks like a curses window (addstr, addch, move, getch...),
+but drawing only changes a back buffer of (char, attr) cells. flush()
+compares it with the front buffer, i.e. what the terminal shows, and sends
+only the changed runs of cells, followed by a single doupdate(). getch(),
+getstr() and refresh() flush first, so callers never need to.
+
+Without a window the screen is headless: it renders to an in-memory grid,
+reads keys from a queue and runs on a virtual clock, so S-BASIC scripts,
+SEDIT and Snake can be tested and benchmarked without a terminal.
+"""
+import curses
+import time
+from collections import deque
+
+BLANK = (' ', 0)
+
+
+def color_pair(n):
+    """curses.color_pair(), also usable before curses is initialised."""
+    try:
+        return curses.color_pair(n)
+    except curses.error:
+        return n << 8
+
+
+class VirtualScreen:
+    def __init__(self, window=None, rows=24, cols=80, keys=()):
+        self.window = window
+        if window is not None:
+            rows, cols = window.getmaxyx()
+        self.y = 0
+        self.x = 0
+        self.scrolling = False
+        self._delay = -1  # getch timeout in ms, -1 blocks
+        self._keys = deque(keys)
+        self._time = 0.0  # virtual clock of a headless screen
+        self.flushes = 0
+        self.cells_written = 0
+        self._allocate(rows, cols)
+
+    def _allocate(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self._back = [[BLANK] * cols for _ in range(rows)]
+        self._front = [[None] * cols for _ in range(rows)]  # None: unknown
+        self._dirty = set(range(rows))
+        self.y = min(self.y, rows - 1)
+        self.x = min(self.x, cols - 1)
+
+    # --- window-like drawing API ---
+
+    def getmaxyx(self):
+        if self.window is not None:
+            size = self.window.getmaxyx()
+            if size != (self.rows, self.cols):
+                self._allocate(*size)
+        return self.rows, self.cols
+
+    def getyx(self):
+        return self.y, self.x
+
+    def move(self, y, x):
+        if not (0 <= y < self.rows and 0 <= x < self.cols):
+            raise curses.error('move() returned ERR')
+        self.y, self.x = y, x
+
+    def addstr(self, *args):
+        """addstr([y, x,] text[, attr]) with curses' wrapping and newlines."""
+        if len(args) >= 3:
+            self.move(args[0], args[1])
+            args = args[2:]
+        text = args[0]
+        attr = args[1] if len(args) > 1 else 0
+        for ch in text:
+            if ch == '\n':
+                self.clrtoeol()
+                self._newline()
+                continue
+            self._put(ch, attr)
+
+    def addch(self, *args):
+        """addch([y, x,] ch[, attr]); `ch` may be a str or an ACS chtype."""
+        if len(args) >= 3:
+            self.move(args[0], args[1])
+            args = args[2:]
+        ch = args[0]
+        attr = args[1] if len(args) > 1 else 0
+        if ch == '\n':
+            self.clrtoeol()
+            self._newline()
+        else:
+            self._put(ch, attr)
+
+    def clrtoeol(self):
+        row = self._back[self.y]
+        row[self.x:] = [BLANK] * (self.cols - self.x)
+        self._dirty.add(self.y)
+
+    def erase(self):
+        for row in self._back:
+            row[:] = [BLANK] * self.cols
+        self._dirty.update(range(self.rows))
+        self.y = self.x = 0
+
+    def clear(self):
+        """Like erase(), but also repaints every cell on the next flush."""
+        self.erase()
+        self.touchwin()
+
+    def touchwin(self):
+        for row in self._front:
+            row[:] = [None] * self.cols
+        self._dirty.update(range(self.rows))
+        if self.window is not None:
+            self.window.clear()
+
+    def scrollok(self, flag):
+        self.scrolling = bool(flag)
+
+    def save(self):
+        """Returns a copy of the back buffer, e.g. before drawing an overlay."""
+        return [row[:] for row in self._back], (self.y, self.x)
+
+    def restore(self, saved):
+        grid, (self.y, self.x) = saved
+        for y, row in enumerate(grid[:self.rows]):
+            if row != self._back[y]:
+                self._back[y] = row[:self.cols] + [BLANK] * (self.cols - len(row))
+                self._dirty.add(y)
+
+    def newwin(self, rows, cols, y, x):
+        """A screen for a sub-area; headless screens share the key queue."""
+        if self.window is not None:
+            return VirtualScreen(curses.newwin(rows, cols, y, x))
+        win = VirtualScreen(None, rows, cols)
+        win._keys = self._keys
+        return win
+
+    # --- flushing ---
+
+    def refresh(self):
+        self.flush()
+
+    def flush(self):
+        """Writes the changed cells to the terminal with one update."""
+        window = self.window
+        for y in sorted(self._dirty):
+            back, front = self._back[y], self._front[y]
+            if back == front:
+                continue
+            x = 0
+            while x < self.cols:
+                if back[x] == front[x]:
+                    x += 1
+                    continue
+                # collect a run of changed cells sharing one attribute
+                ch, attr = back[x]
+                if not isinstance(ch, str):
+                    if window is not None:
+                        self._write(window.addch, y, x, ch, attr)
+                    x += 1
+                    self.cells_written += 1
+                    continue
+                end = x + 1
+                while (end < self.cols and back[end] != front[end]
+                       and back[end][1] == attr and isinstance(back[end][0], str)):
+                    end += 1
+                if window is not None:
+                    self._write(window.addstr, y, x, ''.join(c for c, _ in back[x:end]), attr)
+                self.cells_written += end - x
+                x = end
+            self._front[y] = back[:]
+        self._dirty.clear()
+        self.flushes += 1
+        if window is not None:
+            try:
+                window.move(self.y, self.x)
+            except curses.error:
+                pass
+            window.noutrefresh()
+            curses.doupdate()
+
+    @staticmethod
+    def _write(fn, y, x, what, attr):
+        try:
+            fn(y, x, what, attr)
+        except curses.error:
+            pass  # the bottom-right cell cannot be written without scrolling
+
+    def lines(self):
+        """What the screen shows, as one string per row (after a flush)."""
+        return [''.join(c if isinstance(c, str) else '#' for c, _ in
+                        (cell or BLANK for cell in row)) for row in self._front]
+
+    # --- input and time ---
+
+    def keypad(self, flag):
+        if self.window is not None:
+            self.window.keypad(flag)
+
+    def timeout(self, delay):
+        self._delay = delay
+        if self.window is not None:
+            self.window.timeout(delay)
+
+    def nodelay(self, flag):
+        self.timeout(0 if flag else -1)
+
+    def feed(self, *keys):
+        """Queues keys (ints or strings) for a headless screen."""
+        for key in keys:
+            if isinstance(key, str):
+                self._keys.extend(ord(c) for c in key)
+            else:
+                self._keys.append(key)
+
+    def getch(self):
+        self.flush()
+        if self.window is not None:
+            return self.window.getch()
+        if self._keys:
+            return self._keys.popleft()
+        if self._delay < 0:
+            raise EOFError('headless screen ran out of keys')
+        self._time += self._delay / 1000
+        return -1
+
+    def getstr(self):
+        """Reads a line with echo, like window.getstr(); returns bytes."""
+        self.flush()
+        if self.window is not None:
+            top = self.y
+            curses.echo()
+            try:
+                data = self.window.getstr()
+            finally:
+                curses.noecho()
+            # the terminal echoed the input itself; copy it into our buffers
+            self.y, self.x = self.window.getyx()
+            for y in range(top, self.y + 1):
+                row = [(c, 0) for c in self.window.instr(y, 0, self.cols).decode('utf-8', 'replace')]
+                row = (row + [BLANK] * self.cols)[:self.cols]
+                self._back[y] = row
+                self._front[y] = row[:]
+            return data
+        chars = []
+        while True:
+            key = self.getch()
+            if key in (10, 13):
+                break
+            if key >= 0:
+                chars.append(chr(key))
+        text = ''.join(chars)
+        self.addstr(text + '\n')  # like the terminal echoing Enter
+        return text.encode('utf-8')
+
+    def clock(self):
+        """Seconds on a monotonic clock; virtual for headless screens."""
+        if self.window is not None:
+            return time.monotonic()
+        return self._time
+
+    def sleep(self, seconds):
+        self.flush()
+        if self.window is not None:
+            time.sleep(seconds)
+        else:
+            self._time += seconds
+
+    # --- internals ---
+
+    def _put(self, ch, attr):
+        self._back[self.y][self.x] = (ch, attr)
+        self._dirty.add(self.y)
+        self.x += 1
+        if self.x >= self.cols:
+            self._newline()
+
+    def _newline(self):
+        self.x = 0
+        if self.y + 1 < self.rows:
+            self.y += 1
+        elif self.scrolling:
+            self._back.pop(0)
+            self._back.append([BLANK] * self.cols)
+            self._dirty.update(range(self.rows))
+        else:
+            # like curses: the write that runs off the bottom fails
+            self.x = self.cols - 1
+            raise curses.error('addstr() returned ERR')